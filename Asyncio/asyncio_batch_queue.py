@@ -0,0 +1,179 @@
+# asyncio_batch_queue.py
+
+import asyncio
+import collections
+
+
+class BatchQueue:
+    """
+    FIFO queue for coroutines that moves items in batches.
+    put_many() adds a whole list and get_batch() returns up to max_items items, so waiters are
+    woken once per batch instead of once per item. The interface otherwise follows asyncio.Queue:
+    qsize(), empty(), full(), put(), get(), task_done() and join().
+    close() replaces stop sentinels: once the queue is closed and drained, get_batch() returns [].
+    """
+
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self._items = collections.deque()
+        self._getters = collections.deque()
+        self._putters = collections.deque()
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+        self._closed = False
+
+    def qsize(self):
+        return len(self._items)
+
+    def empty(self):
+        return not self._items
+
+    def full(self):
+        return 0 < self.maxsize <= len(self._items)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        """no more items will be added, consumers waiting on an empty queue get []"""
+        self._closed = True
+        while self._getters:
+            self._wakeup_next(self._getters)
+
+    @staticmethod
+    def _wakeup_next(waiters):
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    async def _wait(self, waiters, timeout=None):
+        """wait until woken by _wakeup_next() or until timeout seconds have passed"""
+        loop = asyncio.get_event_loop()
+        waiter = loop.create_future()
+        waiters.append(waiter)
+        handle = loop.call_later(timeout, _set_result, waiter) if timeout is not None else None
+        try:
+            await waiter
+        except BaseException:
+            waiter.cancel()
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+            # pass on a wakeup this waiter received but cannot use anymore
+            if not waiter.cancelled():
+                self._wakeup_next(waiters)
+            raise
+        finally:
+            if handle is not None:
+                handle.cancel()
+        if handle is not None:
+            try:
+                waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    async def put_many(self, items):
+        """add every item, waiting for free slots of a bounded queue as often as needed"""
+        if self._closed:
+            raise RuntimeError('put on a closed queue')
+        if not isinstance(items, (list, tuple)):
+            items = list(items)
+        if not items:
+            # an empty batch must not clear _finished, join() would wait for task_done() forever
+            return
+        # fast path: the whole batch fits without waiting
+        if self.maxsize <= 0 or len(items) <= self.maxsize - len(self._items):
+            self._items.extend(items)
+            self._unfinished += len(items)
+            self._finished.clear()
+            if self._getters:
+                self._wakeup_next(self._getters)
+            return
+        position = 0
+        while position < len(items):
+            while self.full():
+                await self._wait(self._putters)
+            count = len(items) - position
+            if self.maxsize > 0:
+                count = min(count, self.maxsize - len(self._items))
+            self._items.extend(items[position:position + count])
+            position += count
+            self._unfinished += count
+            self._finished.clear()
+            self._wakeup_next(self._getters)
+        if not self.full():
+            self._wakeup_next(self._putters)
+
+    async def put(self, item):
+        await self.put_many((item,))
+
+    def _take(self, batch, max_items):
+        items = self._items
+        count = max_items - len(batch)
+        if count >= len(items):
+            batch.extend(items)
+            items.clear()
+        else:
+            batch.extend([items.popleft() for _ in range(count)])
+        if self._putters:
+            self._wakeup_next(self._putters)
+
+    async def get_batch(self, max_items, max_wait=None):
+        """
+        wait for at least one item and return up to max_items items.
+        With max_wait the batch is filled with items arriving during max_wait seconds after the
+        first one, otherwise only the items already queued are returned.
+        Returns [] once the queue is closed and empty.
+        """
+        while not self._items:
+            if self._closed:
+                return []
+            await self._wait(self._getters)
+        batch = []
+        self._take(batch, max_items)
+        if max_wait is not None and len(batch) < max_items:
+            loop = asyncio.get_event_loop()
+            deadline = loop.time() + max_wait
+            while len(batch) < max_items and not self._closed:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    await self._wait(self._getters, timeout)
+                except asyncio.CancelledError:
+                    # give the items collected so far back, in order, to the next consumer
+                    self._items.extendleft(reversed(batch))
+                    self._wakeup_next(self._getters)
+                    raise
+                self._take(batch, max_items)
+        # let the next consumer take what is left
+        if self._getters and (self._items or self._closed):
+            self._wakeup_next(self._getters)
+        return batch
+
+    async def get(self):
+        batch = await self.get_batch(1)
+        if not batch:
+            raise RuntimeError('get on a closed and empty queue')
+        return batch[0]
+
+    def task_done(self, count=1):
+        """mark count items, usually a whole batch, as processed"""
+        if count > self._unfinished:
+            raise ValueError('task_done() called too many times')
+        self._unfinished -= count
+        if self._unfinished == 0:
+            self._finished.set()
+
+    async def join(self):
+        await self._finished.wait()
+
+
+def _set_result(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
@@ -0,0 +1,162 @@
+# asyncio_consumer_pool.py
+
+import asyncio
+import logging
+import math
+
+from asyncio_batch_queue import BatchQueue
+
+
+class ConsumerPool:
+    """
+    Consumer tasks for a BatchQueue whose number follows the load.
+    Every `interval` seconds the supervisor estimates how many consumers are needed to work off
+    the queued items within `target_delay` seconds, from the queue size and the average time
+    handler() takes per item, and starts or retires consumers within [min_consumers, max_consumers].
+    Consumers are added at once when the backlog grows. Only consumers waiting for items are
+    retired, half of the surplus per interval, so the pool does not shrink while it is still
+    working off a burst and a short lull does not tear it down.
+    close() closes the queue, so no stop sentinel per consumer is needed.
+    A failing handler() does not stop its consumer, the exception is logged and counted in errors.
+    """
+    log = logging.getLogger('ConsumerPool')
+
+    def __init__(self, queue, handler, min_consumers=1, max_consumers=10, target_delay=1., interval=.1,
+                 batch_size=1):
+        """
+        :type queue BatchQueue
+        :param handler: coroutine function called with every item
+        """
+        self.queue = queue
+        self.handler = handler
+        self.min_consumers = min_consumers
+        self.max_consumers = max_consumers
+        self.target_delay = target_delay
+        self.interval = interval
+        self.batch_size = batch_size
+        self.consumers = set()
+        # consumers waiting in get_batch(), they can be cancelled without losing items
+        self.idle = set()
+        # moving average of the handler time per item, in seconds
+        self.latency = None
+        self.started = 0
+        self.retired = 0
+        self.peak = 0
+        self.errors = 0
+        self.supervisor = None
+
+    def __len__(self):
+        return len(self.consumers)
+
+    def start(self):
+        for _ in range(self.min_consumers):
+            self._spawn()
+        self.supervisor = asyncio.ensure_future(self._supervise())
+
+    def _spawn(self):
+        task = asyncio.ensure_future(self._consume())
+        self.consumers.add(task)
+        self.started += 1
+        self.peak = max(self.peak, len(self.consumers))
+
+    def _retire(self):
+        self.idle.pop().cancel()
+        self.retired += 1
+
+    async def _consume(self):
+        loop = asyncio.get_event_loop()
+        task = asyncio.current_task()
+        try:
+            while True:
+                self.idle.add(task)
+                # get_batch() gives back the items it holds when cancelled,
+                # so cancelling an idle consumer never drops items
+                batch = await self.queue.get_batch(self.batch_size)
+                self.idle.discard(task)
+                if not batch:
+                    break
+                for item in batch:
+                    started = loop.time()
+                    try:
+                        await self.handler(item)
+                    except Exception:
+                        self.errors += 1
+                        self.log.exception('handler failed for %r', item)
+                    elapsed = loop.time() - started
+                    self.latency = elapsed if self.latency is None else .8 * self.latency + .2 * elapsed
+                self.queue.task_done(len(batch))
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.idle.discard(task)
+            self.consumers.discard(task)
+
+    def wanted(self):
+        """number of consumers needed for the current backlog"""
+        backlog = self.queue.qsize()
+        active = len(self.consumers)
+        if not backlog:
+            wanted = self.min_consumers
+        elif self.latency is None:
+            # nothing measured yet, grow one by one
+            wanted = active + 1
+        else:
+            wanted = math.ceil(backlog * self.latency / self.target_delay)
+        return max(self.min_consumers, min(self.max_consumers, wanted))
+
+    def scale(self):
+        wanted = self.wanted()
+        active = len(self.consumers)
+        if wanted > active:
+            for _ in range(wanted - active):
+                self._spawn()
+        elif wanted < active:
+            for _ in range(min(len(self.idle), max(1, (active - wanted) // 2))):
+                self._retire()
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.scale()
+
+    async def close(self):
+        """stop scaling, let the consumers finish the queued items and wait for them to end"""
+        if self.supervisor is not None:
+            self.supervisor.cancel()
+        self.queue.close()
+        if not self.consumers and self.queue.qsize():
+            self._spawn()
+        while self.consumers:
+            await asyncio.wait(list(self.consumers))
+
+
+async def main():
+    queue = BatchQueue()
+
+    async def handle(item):
+        await asyncio.sleep(.05)
+
+    pool = ConsumerPool(queue, handle, min_consumers=1, max_consumers=20, target_delay=.2, interval=.05)
+    pool.start()
+
+    async def report(name):
+        print('{:<8} queued {:>4}  consumers {:>3}'.format(name, queue.qsize(), len(pool)))
+
+    for burst in range(2):
+        await queue.put_many(range(200))
+        await report('burst')
+        for _ in range(3):
+            await asyncio.sleep(.2)
+            await report('working')
+        await queue.join()
+        await report('drained')
+        await asyncio.sleep(1)
+        await report('idle')
+    await pool.close()
+    print('started {} consumers, retired {}, at most {} at once'.format(pool.started, pool.retired, pool.peak))
+
+
+if __name__ == '__main__':
+    event_loop = asyncio.get_event_loop()
+    event_loop.run_until_complete(main())
+    event_loop.close()
@@ -0,0 +1,70 @@
+# asyncio_consumer_pool_benchmark.py
+# Bursty workload: `bursts` bursts of `burst` items separated by `gap` idle seconds, every item
+# waits `service` seconds like a call to another service. Compares static pools of the minimum and
+# maximum size with an autoscaling ConsumerPool: time to drain each burst, and the number of
+# consumer tasks and the traced memory at the end of each idle gap.
+#
+# python asyncio_consumer_pool_benchmark.py --bursts 5 --burst 2000 --service 0.01 --min 2 --max 200
+
+import argparse
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from asyncio_batch_queue import BatchQueue
+from asyncio_consumer_pool import ConsumerPool
+
+
+async def run(args, min_consumers, max_consumers):
+    queue = BatchQueue()
+
+    async def handle(item):
+        await asyncio.sleep(args.service)
+
+    pool = ConsumerPool(queue, handle, min_consumers, max_consumers, target_delay=args.target_delay,
+                        interval=args.interval)
+    drain_times = []
+    idle_consumers = []
+    idle_memory = []
+    tracemalloc.start()
+    pool.start()
+    for _ in range(args.bursts):
+        time_start = time.perf_counter()
+        await queue.put_many(range(args.burst))
+        await queue.join()
+        drain_times.append(time.perf_counter() - time_start)
+        await asyncio.sleep(args.gap)
+        idle_consumers.append(len(pool))
+        idle_memory.append(tracemalloc.get_traced_memory()[0])
+    await pool.close()
+    tracemalloc.stop()
+    return {'drain_seconds': statistics.mean(drain_times),
+            'idle_consumers': statistics.mean(idle_consumers),
+            'idle_kib': statistics.mean(idle_memory) / 1024,
+            'peak_consumers': pool.peak}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bursts', type=int, default=5)
+    parser.add_argument('--burst', type=int, default=2000, help='items per burst')
+    parser.add_argument('--service', type=float, default=.01, help='seconds spent on every item')
+    parser.add_argument('--gap', type=float, default=1., help='idle seconds between bursts')
+    parser.add_argument('--min', type=int, default=2, help='minimum number of consumers')
+    parser.add_argument('--max', type=int, default=200, help='maximum number of consumers')
+    parser.add_argument('--target-delay', type=float, default=.05,
+                        help='seconds the autoscaler aims to work off the backlog in')
+    parser.add_argument('--interval', type=float, default=.01, help='autoscaler check interval')
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    print('{:<16}{:>14}{:>16}{:>12}{:>10}'.format('pool', 'drain s/burst', 'idle consumers', 'idle KiB', 'peak'))
+    for name, bounds in (('static min', (args.min, args.min)),
+                         ('static max', (args.max, args.max)),
+                         ('autoscaling', (args.min, args.max))):
+        result = loop.run_until_complete(run(args, *bounds))
+        print('{:<16}{drain_seconds:>14.3f}{idle_consumers:>16.1f}{idle_kib:>12.1f}{peak_consumers:>10}'.format(
+            name, **result))
+    loop.close()
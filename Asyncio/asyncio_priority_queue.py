@@ -0,0 +1,218 @@
+# asyncio_priority_queue.py
+
+import asyncio
+import heapq
+import itertools
+
+from asyncio_batch_queue import BatchQueue
+
+
+class TokenBucket:
+    """allow `rate` items per second on average and bursts of up to `burst` items"""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError('rate must be greater than 0')
+        if burst < 1:
+            raise ValueError('burst must be at least 1')
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = None
+
+    def refill(self, now):
+        if self.updated is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """seconds until the next token, after refill()"""
+        return max(0., (1 - self.tokens) / self.rate)
+
+
+class RateLimitedQueue(BatchQueue):
+    """
+    Priority queue with a token bucket rate limit per class of items.
+    put(item, priority, cls): lower priorities are served first, items of the same priority in
+    FIFO order. get() returns the most urgent item of a class that has a token left, so a class
+    that is over its rate does not hold back the others; when every queued class is over its rate
+    the consumers sleep until the next token. rates maps a class to (items per second, burst),
+    classes without an entry are not limited.
+    The rest of the interface comes from BatchQueue: get_batch(), task_done(), join(), close().
+    """
+
+    def __init__(self, maxsize=0, rates=None):
+        super().__init__(maxsize)
+        # one heap of (priority, sequence, item) per class, only classes with queued items
+        self._heaps = {}
+        self._size = 0
+        self._sequence = itertools.count()
+        self._buckets = {cls: TokenBucket(rate, burst) for cls, (rate, burst) in (rates or {}).items()}
+
+    def qsize(self):
+        return self._size
+
+    def empty(self):
+        return not self._size
+
+    def full(self):
+        return 0 < self.maxsize <= self._size
+
+    def _push(self, item, priority, cls):
+        heap = self._heaps.get(cls)
+        if heap is None:
+            heap = self._heaps[cls] = []
+        heapq.heappush(heap, (priority, next(self._sequence), item))
+        self._size += 1
+        self._unfinished += 1
+        self._finished.clear()
+
+    async def put(self, item, priority=0, cls=None):
+        if self._closed:
+            raise RuntimeError('put on a closed queue')
+        while self.full():
+            await self._wait(self._putters)
+        self._push(item, priority, cls)
+        if self._getters:
+            self._wakeup_next(self._getters)
+
+    async def put_many(self, items, priority=0, cls=None):
+        """add every item with the same priority and class"""
+        if self._closed:
+            raise RuntimeError('put on a closed queue')
+        for item in items:
+            while self.full():
+                if self._getters:
+                    self._wakeup_next(self._getters)
+                await self._wait(self._putters)
+            self._push(item, priority, cls)
+        if self._getters:
+            self._wakeup_next(self._getters)
+
+    def _pop(self, now):
+        """
+        remove the most urgent item whose class has a token and return (heap entry, class),
+        or (None, seconds until the next token)
+        """
+        best = None
+        delay = None
+        for cls, heap in self._heaps.items():
+            if best is not None and heap[0] >= best[0][0]:
+                continue
+            bucket = self._buckets.get(cls)
+            if bucket is not None:
+                bucket.refill(now)
+                if bucket.tokens < 1:
+                    wait = bucket.delay()
+                    delay = wait if delay is None else min(delay, wait)
+                    continue
+            best = heap, cls
+        if best is None:
+            return None, delay
+        heap, cls = best
+        entry = heapq.heappop(heap)
+        if not heap:
+            del self._heaps[cls]
+        bucket = self._buckets.get(cls)
+        if bucket is not None:
+            bucket.tokens -= 1
+        self._size -= 1
+        return entry, cls
+
+    def _unpop(self, entry, cls):
+        """put an entry taken by _pop() back, with its original order, and refund its token"""
+        heapq.heappush(self._heaps.setdefault(cls, []), entry)
+        bucket = self._buckets.get(cls)
+        if bucket is not None:
+            bucket.tokens = min(bucket.burst, bucket.tokens + 1)
+        self._size += 1
+
+    async def get(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            if self._size:
+                entry, value = self._pop(loop.time())
+                if entry is not None:
+                    if self._putters:
+                        self._wakeup_next(self._putters)
+                    if self._getters and self._size:
+                        self._wakeup_next(self._getters)
+                    return entry[2]
+                # every queued class is over its rate: wait for a token or a new item
+                await self._wait(self._getters, value)
+            elif self._closed:
+                raise RuntimeError('get on a closed and empty queue')
+            else:
+                await self._wait(self._getters)
+
+    async def get_batch(self, max_items, max_wait=None):
+        """
+        up to max_items items in priority order, within the rate limits; waits for the first one
+        like get() and, with max_wait, collects items that become available during max_wait seconds
+        """
+        loop = asyncio.get_event_loop()
+        # (heap entry, class) pairs, kept so that a cancelled call can put them back
+        batch = []
+        deadline = None
+        while len(batch) < max_items:
+            delay = None
+            now = loop.time()
+            while self._size and len(batch) < max_items:
+                entry, value = self._pop(now)
+                if entry is None:
+                    delay = value
+                    break
+                batch.append((entry, value))
+            # a closed queue still hands out the items held back by the rate limits
+            if len(batch) == max_items or (self._closed and not self._size):
+                break
+            if batch:
+                if max_wait is None:
+                    break
+                if deadline is None:
+                    deadline = loop.time() + max_wait
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                delay = timeout if delay is None else min(delay, timeout)
+            try:
+                await self._wait(self._getters, delay)
+            except asyncio.CancelledError:
+                for entry, cls in batch:
+                    self._unpop(entry, cls)
+                if batch:
+                    self._wakeup_next(self._getters)
+                raise
+        if self._putters:
+            self._wakeup_next(self._putters)
+        if self._getters and (self._size or self._closed):
+            self._wakeup_next(self._getters)
+        return [entry[2] for entry, _ in batch]
+
+
+async def main():
+    # bulk items are limited to 20 per second, urgent ones overtake them
+    queue = RateLimitedQueue(rates={'bulk': (20, 5)})
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+
+    async def consumer():
+        while True:
+            item = await queue.get()
+            print('{:6.3f}s {}'.format(loop.time() - start, item))
+            queue.task_done()
+
+    consumers = [asyncio.ensure_future(consumer()) for _ in range(2)]
+    await queue.put_many(['bulk {}'.format(i) for i in range(10)], priority=10, cls='bulk')
+    await asyncio.sleep(.1)
+    await queue.put('urgent', priority=0, cls='urgent')
+    await queue.join()
+    for task in consumers:
+        task.cancel()
+    await asyncio.wait(consumers)
+
+
+if __name__ == '__main__':
+    event_loop = asyncio.get_event_loop()
+    event_loop.run_until_complete(main())
+    event_loop.close()
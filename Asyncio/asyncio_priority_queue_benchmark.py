@@ -0,0 +1,114 @@
+# asyncio_priority_queue_benchmark.py
+# Scheduling overhead of RateLimitedQueue: items/sec through producer/consumer tasks that do
+# nothing with the items, against asyncio.Queue and asyncio.PriorityQueue, and how close the
+# achieved rate of a limited class comes to its limit.
+#
+# python asyncio_priority_queue_benchmark.py --items 500000 --consumers 4 --classes 4
+
+import argparse
+import asyncio
+import random
+import time
+
+from asyncio_priority_queue import RateLimitedQueue
+
+
+async def drive(queue, put, items, consumers, batch_size=None):
+    """put every (priority, cls, item) of items, consume them with no-op consumers"""
+
+    async def consume():
+        while True:
+            if batch_size:
+                batch = await queue.get_batch(batch_size)
+                queue.task_done(len(batch))
+            else:
+                await queue.get()
+                queue.task_done()
+
+    tasks = [asyncio.ensure_future(consume()) for _ in range(consumers)]
+    for priority, cls, item in items:
+        await put(item, priority, cls)
+    await queue.join()
+    for task in tasks:
+        task.cancel()
+    await asyncio.wait(tasks)
+
+
+def fifo():
+    queue = asyncio.Queue(maxsize=10000)
+
+    async def put(item, priority, cls):
+        await queue.put(item)
+    return queue, put
+
+
+def priority():
+    queue = asyncio.PriorityQueue(maxsize=10000)
+
+    async def put(item, priority, cls):
+        await queue.put((priority, item))
+    return queue, put
+
+
+def rate_limited(rates=None):
+    queue = RateLimitedQueue(maxsize=10000, rates=rates)
+    return queue, queue.put
+
+
+async def achieved_rate(rate, burst, items, consumers):
+    """items/sec of one class limited to rate while an unlimited class competes for the consumers"""
+    queue = RateLimitedQueue(rates={'limited': (rate, burst)})
+    served = []
+
+    async def consume():
+        loop = asyncio.get_event_loop()
+        while True:
+            item = await queue.get()
+            if item == 'limited':
+                served.append(loop.time())
+            queue.task_done()
+
+    tasks = [asyncio.ensure_future(consume()) for _ in range(consumers)]
+    await queue.put_many(['limited'] * items, priority=0, cls='limited')
+    await queue.put_many(['other'] * items * 10, priority=1, cls='other')
+    await queue.join()
+    for task in tasks:
+        task.cancel()
+    await asyncio.wait(tasks)
+    return (len(served) - 1) / (served[-1] - served[0])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=500000)
+    parser.add_argument('--consumers', type=int, default=4)
+    parser.add_argument('--classes', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=1000, help='limit of the class in the accuracy test')
+    # with a burst of 1 every late timer wakeup is lost, a few milliseconds worth of tokens absorb it
+    parser.add_argument('--burst', type=int, default=10, help='burst of the class in the accuracy test')
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    random.seed(0)
+    items = [(random.randrange(10), 'class {}'.format(random.randrange(args.classes)), i) for i in range(args.items)]
+    # limits far above the achievable rate: measures the token bucket bookkeeping only
+    unreachable = {'class {}'.format(n): (1e9, 1e6) for n in range(args.classes)}
+    patterns = (
+        ('asyncio.Queue', fifo, None),
+        ('asyncio.PriorityQueue', priority, None),
+        ('RateLimitedQueue', rate_limited, None),
+        ('  with rate limits', lambda: rate_limited(unreachable), None),
+        ('  get_batch(64)', lambda: rate_limited(unreachable), 64),
+    )
+    print('{:<24}{:>12}{:>14}{:>12}'.format('queue', 'seconds', 'items/sec', 'us/item'))
+    for name, factory, batch_size in patterns:
+        queue, put = factory()
+        time_start = time.perf_counter()
+        loop.run_until_complete(drive(queue, put, items, args.consumers, batch_size))
+        elapsed = time.perf_counter() - time_start
+        print('{:<24}{:>12.3f}{:>14.0f}{:>12.2f}'.format(name, elapsed, args.items / elapsed,
+                                                        elapsed / args.items * 1e6))
+    rate = loop.run_until_complete(achieved_rate(args.rate, args.burst, int(args.rate * 2), args.consumers))
+    print('class limited to {:.0f}/s (burst {}) served at {:.1f}/s'.format(args.rate, args.burst, rate))
+    loop.close()
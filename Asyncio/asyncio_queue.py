@@ -2,41 +2,41 @@
 
 import asyncio
 
+from asyncio_batch_queue import BatchQueue
 
-async def consumer(n, _queue):
-    """:type _queue asyncio.Queue"""
-    # print('consumer {}: waiting for item'.format(n))
+
+async def consumer(n, _queue, batch_size=4, max_wait=.05):
+    """:type _queue BatchQueue"""
     while True:
-        print('consumer {}: waiting for item'.format(n))
-        item = await _queue.get()
-        print('consumer {}: has item {}'.format(n, item))
-        if item is None:
-            _queue.task_done()
+        print('consumer {}: waiting for items'.format(n))
+        # up to batch_size items, waiting at most max_wait seconds for the batch to fill
+        items = await _queue.get_batch(batch_size, max_wait)
+        if not items:
             break
-        else:
-            await asyncio.sleep(.01 * item)
-            _queue.task_done()
+        print('consumer {}: has items {}'.format(n, items))
+        await asyncio.sleep(.01 * sum(items))
+        _queue.task_done(len(items))
     print('consumer {}: ending'.format(n))
 
 
 async def producer(_queue, workers):
-    """:type _queue asyncio.Queue"""
+    """:type _queue BatchQueue"""
     print('producer: starting')
 
-    for i in range(workers * 3):
-        await _queue.put(i)
-        print('producer: add task {} to queue'.format(i))
+    for start in range(0, workers * 3, 2):
+        items = list(range(start, min(start + 2, workers * 3)))
+        await _queue.put_many(items)
+        print('producer: add tasks {} to queue'.format(items))
 
-    print('producer: adding stop signals to the queue')
-    for i in range(workers):
-        await _queue.put(None)
     print('producer: waiting for queue to empty')
     await _queue.join()
+    print('producer: closing the queue')
+    _queue.close()
     print('producer: ending')
 
 
 async def main(loop, _consumers):
-    queue = asyncio.Queue(maxsize=_consumers)
+    queue = BatchQueue(maxsize=_consumers * 2)
     consumers = [loop.create_task(consumer(i, queue)) for i in range(_consumers)]
     prod = loop.create_task(producer(queue, _consumers))
     await asyncio.wait(consumers + [prod])
@@ -0,0 +1,74 @@
+# asyncio_queue_benchmark.py
+# items/sec through a producer/consumer pipeline with no-op consumers:
+# asyncio.Queue with put()/get()/task_done() per item against BatchQueue with put_many()/get_batch()
+#
+# python asyncio_queue_benchmark.py --items 1000000 --consumers 4 --batch-sizes 1 16 256
+
+import argparse
+import asyncio
+import time
+
+from asyncio_batch_queue import BatchQueue
+
+
+async def per_item(items, consumers, maxsize):
+    queue = asyncio.Queue(maxsize=maxsize)
+
+    async def consume():
+        while True:
+            item = await queue.get()
+            queue.task_done()
+            if item is None:
+                break
+
+    tasks = [asyncio.ensure_future(consume()) for _ in range(consumers)]
+    for item in range(items):
+        await queue.put(item)
+    for _ in range(consumers):
+        await queue.put(None)
+    await queue.join()
+    await asyncio.wait(tasks)
+
+
+async def batched(items, consumers, maxsize, batch_size):
+    queue = BatchQueue(maxsize=maxsize)
+
+    async def consume():
+        while True:
+            batch = await queue.get_batch(batch_size)
+            if not batch:
+                break
+            queue.task_done(len(batch))
+
+    tasks = [asyncio.ensure_future(consume()) for _ in range(consumers)]
+    for start in range(0, items, batch_size):
+        await queue.put_many(range(start, min(start + batch_size, items)))
+    await queue.join()
+    queue.close()
+    await asyncio.wait(tasks)
+
+
+def measure(loop, coroutine):
+    time_start = time.perf_counter()
+    loop.run_until_complete(coroutine)
+    return time.perf_counter() - time_start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--items', type=int, default=1000000)
+    parser.add_argument('--consumers', type=int, default=4)
+    parser.add_argument('--maxsize', type=int, default=10000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 16, 256])
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    print('{:<24}{:>12}{:>16}'.format('pattern', 'seconds', 'items/sec'))
+    elapsed = measure(loop, per_item(args.items, args.consumers, args.maxsize))
+    print('{:<24}{:>12.3f}{:>16.0f}'.format('Queue per item', elapsed, args.items / elapsed))
+    for batch_size in args.batch_sizes:
+        elapsed = measure(loop, batched(args.items, args.consumers, args.maxsize, batch_size))
+        print('{:<24}{:>12.3f}{:>16.0f}'.format('BatchQueue batch={}'.format(batch_size), elapsed,
+                                               args.items / elapsed))
+    loop.close()
@@ -1,9 +1,15 @@
 # echo_client.py
 
+import argparse
 import asyncio
+import collections
 import functools
+import json
 import logging
 import sys
+import time
+
+from latency import run_load
 
 MESSAGES = [
     b'This is the message',
@@ -62,14 +68,82 @@ class EchoClient(asyncio.Protocol):
         super().connection_lost(exc)
 
 
+class EchoLoadClient(asyncio.Protocol):
+    """
+    One connection of the load generator: keeps `depth` messages of `size` bytes in flight
+    until the deadline and records the round trip time of every message.
+    The echo stream has no message boundaries, so a message is complete every `size` bytes.
+    """
+
+    def __init__(self, size, depth, deadline, histogram, future):
+        """
+        :type histogram LatencyHistogram
+        :type future asyncio.Future
+        """
+        super().__init__()
+        self.payload = b'x' * size
+        self.size = size
+        self.depth = depth
+        self.deadline = deadline
+        self.histogram = histogram
+        self.future = future
+        self.sent_times = collections.deque()
+        self.pending = 0
+        self.messages = 0
+
+    def connection_made(self, transport):
+        """:type transport asyncio.Transport"""
+        self.transport = transport
+        for _ in range(self.depth):
+            self.send()
+
+    def send(self):
+        self.sent_times.append(time.perf_counter())
+        self.transport.write(self.payload)
+
+    def data_received(self, data):
+        now = time.perf_counter()
+        self.pending += len(data)
+        while self.pending >= self.size and self.sent_times:
+            self.pending -= self.size
+            self.histogram.record(now - self.sent_times.popleft())
+            self.messages += 1
+            if now < self.deadline:
+                self.send()
+        if not self.sent_times:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        if not self.future.done():
+            self.future.set_result(self.messages)
+
+
 if __name__ == '__main__':
-    _future = asyncio.Future()
-    _factory = functools.partial(EchoClient, messages=MESSAGES, future=_future)
-    _coroutine = event_loop.create_connection(_factory, *SERVER_ADDRESS)
-    logger.debug('waiting for client to complete')
-    try:
-        event_loop.run_until_complete(_coroutine)
-        event_loop.run_until_complete(_future)
-    finally:
-        logger.debug('closing event loop')
-        event_loop.close()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, default=0,
+                        help='run as a load generator with this many connections')
+    parser.add_argument('--size', type=int, default=64, help='message size in bytes')
+    parser.add_argument('--depth', type=int, default=1, help='messages in flight per connection')
+    parser.add_argument('--duration', type=float, default=10, help='seconds to run')
+    args = parser.parse_args()
+
+    if args.connections:
+        logging.getLogger().setLevel(logging.INFO)
+        try:
+            result = event_loop.run_until_complete(
+                run_load(event_loop, EchoLoadClient, SERVER_ADDRESS, args.connections, args.size, args.depth,
+                         args.duration))
+            print(json.dumps(result, indent=2))
+        finally:
+            event_loop.close()
+    else:
+        _future = asyncio.Future()
+        _factory = functools.partial(EchoClient, messages=MESSAGES, future=_future)
+        _coroutine = event_loop.create_connection(_factory, *SERVER_ADDRESS)
+        logger.debug('waiting for client to complete')
+        try:
+            event_loop.run_until_complete(_coroutine)
+            event_loop.run_until_complete(_future)
+        finally:
+            logger.debug('closing event loop')
+            event_loop.close()
@@ -0,0 +1,102 @@
+# echo_scaling.py
+# Measure how connections/sec and bytes/sec scale with `echo_server.py --workers N`.
+# For every N a server is started in a subprocess and driven by several client processes,
+# each running an event loop with many concurrent connections.
+#
+# python echo_scaling.py --max-workers 4 --client-processes 4 --duration 5
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+
+SERVER_ADDRESS = ('localhost', 10000)
+
+
+async def connect_loop(deadline, payload):
+    """open a connection, echo one message, close it; repeat until deadline"""
+    count = 0
+    while time.monotonic() < deadline:
+        reader, writer = await asyncio.open_connection(*SERVER_ADDRESS)
+        writer.write(payload)
+        await reader.readexactly(len(payload))
+        writer.close()
+        await writer.wait_closed()
+        count += 1
+    return count
+
+
+async def stream_loop(deadline, payload):
+    """keep one connection open and echo payload back and forth until deadline"""
+    reader, writer = await asyncio.open_connection(*SERVER_ADDRESS)
+    total = 0
+    while time.monotonic() < deadline:
+        writer.write(payload)
+        await reader.readexactly(len(payload))
+        total += len(payload)
+    writer.close()
+    await writer.wait_closed()
+    return total
+
+
+def run_clients(mode, concurrency, duration, size):
+    async def main():
+        deadline = time.monotonic() + duration
+        loop_func = connect_loop if mode == 'connections' else stream_loop
+        results = await asyncio.gather(*[loop_func(deadline, b'x' * size) for _ in range(concurrency)])
+        return sum(results)
+    return asyncio.run(main())
+
+
+def wait_for_server(timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(SERVER_ADDRESS, timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+def measure(workers, args):
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                            'echo_server.py'),
+                               '--workers', str(workers), '--log-level', 'WARNING'])
+    try:
+        wait_for_server()
+        # give every worker time to bind before measuring
+        time.sleep(0.5)
+        result = {}
+        for mode, size in (('connections', 64), ('bytes', args.size)):
+            with Pool(args.client_processes) as pool:
+                time_start = time.monotonic()
+                totals = pool.starmap(run_clients, [(mode, args.concurrency, args.duration, size)]
+                                      * args.client_processes)
+                result[mode] = sum(totals) / (time.monotonic() - time_start)
+        return result
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--client-processes', type=int, default=os.cpu_count())
+    parser.add_argument('--concurrency', type=int, default=50, help='connections per client process')
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--size', type=int, default=16 * 1024, help='message size for the bytes/sec test')
+    args = parser.parse_args()
+
+    baseline = None
+    for workers in range(1, args.max_workers + 1):
+        result = measure(workers, args)
+        baseline = baseline or result
+        print('workers = {:>2}  {:>10.0f} connections/s ({:.2f}x)  {:>8.1f} MB/s ({:.2f}x)'.format(
+            workers, result['connections'], result['connections'] / baseline['connections'],
+            result['bytes'] / 1e6, result['bytes'] / baseline['bytes']))
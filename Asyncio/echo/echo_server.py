@@ -1,10 +1,15 @@
 # echo_server.py
 
+import argparse
 import asyncio
+import functools
 import logging
+import os
+import signal
 import sys
 
 SERVER_ADDRESS = ('localhost', 10000)
+UNIX_PATH = '/tmp/echo_server.sock'
 logging.basicConfig(
     level=logging.DEBUG,
     format='%(asctime)s %(name)s: %(message)s',
@@ -14,46 +19,260 @@ logger = logging.getLogger('main')
 event_loop = asyncio.get_event_loop()
 
 
+class ServerStats:
+    """counters shared by every connection of one server"""
+
+    def __init__(self):
+        self.connections_total = 0
+        self.connections_active = 0
+        self.connections_rejected = 0
+        self.connections_idle_closed = 0
+        self.messages_received = 0
+        self.bytes_received = 0
+        self.bytes_sent = 0
+        self.reading_paused = 0
+        # new buffers created on the receive path (bytes objects, copies, grown buffers)
+        self.buffer_allocations = 0
+
+    def as_dict(self):
+        return dict(vars(self))
+
+    def __str__(self):
+        return ' '.join('{}={}'.format(name, value) for name, value in vars(self).items())
+
+
 class EchoServer(asyncio.Protocol):
-    def __init__(self) -> None:
+    # one logger for every connection, the peer address is passed as a logging argument
+    log = logging.getLogger('EchoServer')
+
+    def __init__(self, stats=None, high_water=None, low_water=None, backpressure=True,
+                 max_connections=None, idle_timeout=None) -> None:
+        """
+        :type stats ServerStats
+        :param high_water: write buffer size (bytes) above which reading from the peer is paused
+        :param low_water: write buffer size (bytes) below which reading is resumed
+        :param backpressure: pause reading while the peer does not read its echoes
+        :param max_connections: close new connections while this many are open on the server
+        :param idle_timeout: close connections that have not sent anything for this many seconds
+        """
         super().__init__()
+        self.stats = stats or ServerStats()
+        self.high_water = high_water
+        self.low_water = low_water
+        self.backpressure = backpressure
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.accepted = False
+        self.idle_handle = None
 
     def connection_made(self, transport):
         """:type transport asyncio.Transport"""
         self.transport = transport
-        self.address = transport.get_extra_info('peername')
-        fmt = 'EchoServer_{}_{}'.format(*self.address)
-        self.log = logging.getLogger(fmt)
-        self.log.debug('connection accepted')
+        # peername is an empty string for unix domain sockets
+        self.address = transport.get_extra_info('peername') or 'unix'
+        self.stats.connections_total += 1
+        if self.max_connections is not None and self.stats.connections_active >= self.max_connections:
+            self.stats.connections_rejected += 1
+            self.log.debug('%s connection rejected, %d connections open', self.address, self.stats.connections_active)
+            transport.abort()
+            return
+        self.accepted = True
+        self.stats.connections_active += 1
+        if self.high_water is not None or self.low_water is not None:
+            transport.set_write_buffer_limits(high=self.high_water, low=self.low_water)
+        if self.idle_timeout is not None:
+            self.loop = asyncio.get_event_loop()
+            self.last_activity = self.loop.time()
+            self.idle_handle = self.loop.call_later(self.idle_timeout, self.check_idle)
+        self.log.debug('%s connection accepted', self.address)
+
+    def check_idle(self):
+        # data_received only records the time, the timer is rescheduled here instead of
+        # being cancelled and created again for every message
+        idle = self.loop.time() - self.last_activity
+        if idle >= self.idle_timeout:
+            self.stats.connections_idle_closed += 1
+            self.log.debug('%s idle for %.1f seconds, closing', self.address, idle)
+            self.idle_handle = None
+            self.transport.close()
+        else:
+            self.idle_handle = self.loop.call_later(self.idle_timeout - idle, self.check_idle)
 
     def data_received(self, data):
-        self.log.debug('received {}'.format(data))
+        if self.idle_handle is not None:
+            self.last_activity = self.loop.time()
+        # messages are only formatted when DEBUG is enabled
+        debug = self.log.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.log.debug('%s received %r', self.address, data)
         self.transport.write(data)
-        self.log.debug('sent {}'.format(data))
+        stats = self.stats
+        stats.messages_received += 1
+        # asyncio.Protocol receives every chunk as a newly allocated bytes object
+        stats.buffer_allocations += 1
+        stats.bytes_received += len(data)
+        stats.bytes_sent += len(data)
+        if debug:
+            self.log.debug('%s sent %r', self.address, data)
+
+    def pause_writing(self):
+        # the write buffer is above the high watermark: the peer is not reading its echoes,
+        # so stop reading more data from it instead of buffering it in memory
+        if self.backpressure:
+            self.stats.reading_paused += 1
+            self.transport.pause_reading()
+            self.log.debug('%s reading paused', self.address)
+
+    def resume_writing(self):
+        if self.backpressure:
+            self.transport.resume_reading()
+            self.log.debug('%s reading resumed', self.address)
 
     def eof_received(self):
-        self.log.debug('received EOF')
+        self.log.debug('%s received EOF', self.address)
         if self.transport.can_write_eof():
             self.transport.write_eof()
 
     def connection_lost(self, exc):
+        if not self.accepted:
+            return
+        self.stats.connections_active -= 1
+        if self.idle_handle is not None:
+            self.idle_handle.cancel()
         if exc:
-            self.log.error('Error: {}'.format(exc))
+            self.log.error('%s Error: %s', self.address, exc)
         else:
-            self.log.debug('closing')
+            self.log.debug('%s closing', self.address)
         super().connection_lost(exc)
 
 
-if __name__ == '__main__':
-    factory = event_loop.create_server(EchoServer, *SERVER_ADDRESS)
-    server = event_loop.run_until_complete(factory) # type: asyncio.AbstractServer
-    logger.debug('start up on {} port {}'.format(*SERVER_ADDRESS))
+def dump_stats(stats):
+    logger.info('stats %s', stats)
+
+
+def install_stats_signal(loop, stats):
+    """log the counters when the process receives SIGUSR1: kill -USR1 <pid>"""
+    if not hasattr(signal, 'SIGUSR1'):
+        return
+    try:
+        loop.add_signal_handler(signal.SIGUSR1, dump_stats, stats)
+    except (NotImplementedError, RuntimeError):
+        pass
+
+
+def serve(loop, stats, reuse_port=False, unix_path=None, **protocol_options):
+    """
+    run one server on loop until it is stopped by SIGTERM, SIGINT or Ctrl-C
+    :param unix_path: listen on this unix domain socket instead of SERVER_ADDRESS
+    :param protocol_options: high_water, low_water, backpressure, max_connections and idle_timeout of EchoServer
+    """
+    protocol_factory = functools.partial(EchoServer, stats, **protocol_options)
+    if unix_path:
+        factory = loop.create_unix_server(protocol_factory, unix_path)
+    else:
+        factory = loop.create_server(protocol_factory, *SERVER_ADDRESS, reuse_port=reuse_port)
+    server = loop.run_until_complete(factory) # type: asyncio.AbstractServer
+    if unix_path:
+        logger.info('start up on {}'.format(unix_path))
+    else:
+        logger.info('start up on {} port {}'.format(*SERVER_ADDRESS))
+    install_stats_signal(loop, stats)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, loop.stop)
+        except (NotImplementedError, RuntimeError):
+            pass
     try:
-        event_loop.run_forever()
+        loop.run_forever()
     finally:
         logger.debug('closing server')
         server.close()
-        print(type(server))
-        event_loop.run_until_complete(server.wait_closed())
+        loop.run_until_complete(server.wait_closed())
+        if unix_path and os.path.exists(unix_path):
+            os.unlink(unix_path)
+        dump_stats(stats)
         logger.debug('closing event loop')
+        loop.close()
+
+
+def serve_workers(workers, **protocol_options):
+    """
+    fork workers processes, each one runs its own event loop and binds SERVER_ADDRESS with
+    SO_REUSEPORT so the kernel spreads new connections between them.
+    SIGINT/SIGTERM received by the parent are forwarded to the workers, and the parent
+    returns after every worker has closed its server; SIGUSR1 is forwarded as well.
+    :return: the number of workers that exited with an error
+    """
+    children = []
+    for n in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            # the loop created at import time belongs to the parent
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            logging.getLogger().handlers[0].setFormatter(
+                logging.Formatter('%(asctime)s worker-{} %(name)s: %(message)s'.format(n)))
+            status = 0
+            try:
+                serve(loop, ServerStats(), reuse_port=True, **protocol_options)
+            except BaseException:
+                logger.exception('worker failed')
+                status = 1
+            finally:
+                logging.shutdown()
+                os._exit(status)
+        children.append(pid)
+    logger.info('started {} workers: {}'.format(workers, children))
+
+    def forward(signum, frame):
+        for child in children:
+            try:
+                os.kill(child, signal.SIGTERM if signum == signal.SIGINT else signum)
+            except ProcessLookupError:
+                pass
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGUSR1):
+        signal.signal(signum, forward)
+    failed = 0
+    for child in children:
+        while True:
+            try:
+                _, status = os.waitpid(child, 0)
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            # workers stopped by a forwarded signal close their server and exit with 0
+            if code != 0:
+                logger.error('worker {} exited with status {}'.format(child, code))
+                failed += 1
+            break
+    logger.info('all workers stopped')
+    return failed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--log-level', default='DEBUG', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'))
+    parser.add_argument('--workers', type=int, default=1, help='number of worker processes (uses SO_REUSEPORT)')
+    parser.add_argument('--high-water', type=int, default=64 * 1024, help='write buffer high watermark in bytes')
+    parser.add_argument('--low-water', type=int, default=16 * 1024, help='write buffer low watermark in bytes')
+    parser.add_argument('--no-backpressure', action='store_true', help='keep reading from slow peers')
+    parser.add_argument('--unix', nargs='?', const=UNIX_PATH, metavar='PATH',
+                        help='listen on a unix domain socket (default {}) instead of TCP'.format(UNIX_PATH))
+    parser.add_argument('--max-connections', type=int, help='close new connections above this many per process')
+    parser.add_argument('--idle-timeout', type=float, help='close connections idle for this many seconds')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(args.log_level)
+    if args.unix and args.workers > 1:
+        parser.error('--workers relies on SO_REUSEPORT and only works with TCP')
+
+    options = dict(high_water=args.high_water, low_water=args.low_water, backpressure=not args.no_backpressure,
+                   max_connections=args.max_connections, idle_timeout=args.idle_timeout)
+    if args.workers > 1:
         event_loop.close()
+        if serve_workers(args.workers, **options):
+            sys.exit(1)
+    else:
+        serve(event_loop, ServerStats(), unix_path=args.unix, **options)
@@ -0,0 +1,107 @@
+# framed_benchmark.py
+# Compare three echo servers for several message sizes:
+#   protocol  the stream EchoServer (asyncio.Protocol, one bytes object per data_received call)
+#   framed    length-prefixed framing on asyncio.Protocol, the usual bytearray accumulate and slice
+#   buffered  FramedEchoServer (BufferedProtocol, recv_into a reused buffer, frames decoded in place)
+# Server and clients share one event loop and the same framed client, so absolute numbers
+# include the client cost; receive buffer allocations are counted on the server side only.
+#
+# python framed_benchmark.py --connections 50 --depth 8 --duration 3 --sizes 64 1024 16384
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import socket
+
+from echo_server import EchoServer, ServerStats
+from framed_echo import HEADER, FramedEchoServer, FramedEchoClient
+from latency import run_load
+
+
+class StreamFramedEchoServer(EchoServer):
+    """framing on asyncio.Protocol: every chunk is appended to a bytearray and every frame sliced out"""
+
+    def __init__(self, stats=None, **kwargs):
+        super().__init__(stats, **kwargs)
+        self.pending = bytearray()
+
+    def data_received(self, data):
+        stats = self.stats
+        stats.bytes_received += len(data)
+        stats.buffer_allocations += 1
+        pending = self.pending
+        pending += data
+        while len(pending) >= HEADER.size:
+            end = HEADER.size + HEADER.unpack_from(pending)[0]
+            if len(pending) < end:
+                break
+            frame = bytes(pending[:end])
+            del pending[:end]
+            self.transport.write(frame)
+            stats.messages_received += 1
+            stats.bytes_sent += end
+            stats.buffer_allocations += 1
+
+
+# the plain echo server is byte transparent, so the framed client drives both servers
+SERVERS = {
+    'protocol': EchoServer,
+    'framed': StreamFramedEchoServer,
+    'buffered': FramedEchoServer,
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+async def measure(loop, name, connections, size, depth, duration):
+    stats = ServerStats()
+    address = ('localhost', free_port())
+    server = await loop.create_server(functools.partial(SERVERS[name], stats), *address)
+    try:
+        result = await run_load(loop, FramedEchoClient, address, connections, size, depth, duration)
+    finally:
+        server.close()
+        await server.wait_closed()
+    result['server'] = name
+    messages = max(result['count'], 1)
+    result['allocations_per_message'] = round(stats.buffer_allocations / messages, 4)
+    return result
+
+
+def print_table(results):
+    print('{:<10}{:>8}{:>14}{:>12}{:>12}{:>12}'.format(
+        'server', 'size', 'messages/s', 'p50 us', 'p99 us', 'allocs/msg'))
+    for result in results:
+        print('{server:<10}{size:>8}{messages_per_second:>14.0f}{p50_us:>12}{p99_us:>12}'
+              '{allocations_per_message:>12.4f}'.format(**result))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, default=50)
+    parser.add_argument('--depth', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=3)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 1024, 16384])
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    loop = asyncio.new_event_loop()
+    results = []
+    try:
+        for size in args.sizes:
+            for name in SERVERS:
+                results.append(loop.run_until_complete(
+                    measure(loop, name, args.connections, size, args.depth, args.duration)))
+    finally:
+        loop.close()
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
@@ -0,0 +1,204 @@
+# framed_echo.py
+# Length-prefixed framing on top of asyncio.BufferedProtocol.
+# Each frame is a 4 byte big-endian length followed by the payload. Data is received with
+# recv_into() straight into one preallocated bytearray, and frames are decoded in place
+# through a memoryview, so no bytes object is created per received chunk.
+#
+# python framed_echo.py server
+# python framed_echo.py client --connections 100 --depth 8 --size 256
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import struct
+import time
+
+from echo_server import ServerStats, SERVER_ADDRESS, install_stats_signal, dump_stats
+from latency import run_load
+
+HEADER = struct.Struct('!I')
+MAX_FRAME = 1 << 20
+
+
+class FramedProtocol(asyncio.BufferedProtocol):
+    """
+    decode frames from a reusable receive buffer, subclasses implement frames_received()
+    buffer[start:end] holds the received bytes that are not part of a complete frame yet
+    """
+
+    def __init__(self, buffer_size=256 * 1024, max_frame=MAX_FRAME):
+        super().__init__()
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start = 0
+        self.end = 0
+        # bytes needed from start to complete the next frame
+        self.needed = HEADER.size
+        self.max_frame = max_frame
+        self.allocations = 0
+
+    def get_buffer(self, sizehint):
+        # compact before the free tail gets small so that a single recv_into() can still
+        # take many frames, moving the incomplete frame is cheap compared to that
+        if len(self.buffer) - self.start < self.needed or len(self.buffer) - self.end < len(self.buffer) // 4:
+            self._make_room()
+        return self.view[self.end:]
+
+    def _make_room(self):
+        """move the incomplete frame to the front, growing the buffer only for a frame larger than it"""
+        pending = self.end - self.start
+        if self.needed > len(self.buffer):
+            buffer = bytearray(max(self.needed, len(self.buffer) * 2))
+            buffer[:pending] = self.view[self.start:self.end]
+            self.buffer, self.view = buffer, memoryview(buffer)
+            self.allocations += 1
+        else:
+            self.view[:pending] = self.view[self.start:self.end]
+        self.start, self.end = 0, pending
+
+    def buffer_updated(self, nbytes):
+        self.end += nbytes
+        view, position, end = self.view, self.start, self.end
+        count = 0
+        while end - position >= HEADER.size:
+            length = HEADER.unpack_from(view, position)[0]
+            if length > self.max_frame:
+                self.transport.close()
+                return
+            if end - position < HEADER.size + length:
+                break
+            position += HEADER.size + length
+            count += 1
+        if count:
+            self.frames_received(view, self.start, position, count)
+        if position == end:
+            self.start = self.end = 0
+            self.needed = HEADER.size
+        else:
+            self.start = position
+            self.needed = HEADER.size + (HEADER.unpack_from(view, position)[0]
+                                         if end - position >= HEADER.size else 0)
+
+    def frames_received(self, view, start, end, count):
+        """view[start:end] contains count complete frames, only valid until this method returns"""
+        raise NotImplementedError
+
+
+class FramedEchoServer(FramedProtocol):
+    log = logging.getLogger('FramedEchoServer')
+
+    def __init__(self, stats=None, **kwargs):
+        """:type stats ServerStats"""
+        super().__init__(**kwargs)
+        self.stats = stats or ServerStats()
+
+    def connection_made(self, transport):
+        """:type transport asyncio.Transport"""
+        self.transport = transport
+        self.address = transport.get_extra_info('peername')
+        self.stats.connections_total += 1
+        self.stats.connections_active += 1
+        self.log.debug('%s connection accepted', self.address)
+
+    def frames_received(self, view, start, end, count):
+        # echo every complete frame of this read with a single write; the data is copied once
+        # because the receive buffer is reused and the transport may keep what it cannot send now
+        self.transport.write(bytes(view[start:end]))
+        stats = self.stats
+        stats.messages_received += count
+        stats.bytes_received += end - start
+        stats.bytes_sent += end - start
+        stats.buffer_allocations += 1
+
+    def connection_lost(self, exc):
+        self.stats.connections_active -= 1
+        self.stats.buffer_allocations += self.allocations
+        if exc:
+            self.log.error('%s Error: %s', self.address, exc)
+        else:
+            self.log.debug('%s closing', self.address)
+
+
+class FramedEchoClient(FramedProtocol):
+    """
+    load generator connection: keeps `depth` frames of `size` bytes in flight until the
+    deadline and records the round trip time of every frame
+    """
+
+    def __init__(self, size, depth, deadline, histogram, future, **kwargs):
+        """
+        :type histogram LatencyHistogram
+        :type future asyncio.Future
+        """
+        super().__init__(**kwargs)
+        self.frame = HEADER.pack(size) + b'x' * size
+        self.depth = depth
+        self.deadline = deadline
+        self.histogram = histogram
+        self.future = future
+        self.sent_times = []
+        self.messages = 0
+
+    def connection_made(self, transport):
+        """:type transport asyncio.Transport"""
+        self.transport = transport
+        for _ in range(self.depth):
+            self.send()
+
+    def send(self):
+        self.sent_times.append(time.perf_counter())
+        self.transport.write(self.frame)
+
+    def frames_received(self, view, start, end, count):
+        now = time.perf_counter()
+        for sent in self.sent_times[:count]:
+            self.histogram.record(now - sent)
+        del self.sent_times[:count]
+        self.messages += count
+        if now < self.deadline:
+            for _ in range(count):
+                self.send()
+        elif not self.sent_times:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        if not self.future.done():
+            self.future.set_result(self.messages)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('mode', choices=('server', 'client'))
+    parser.add_argument('--log-level', default='INFO', choices=('DEBUG', 'INFO', 'WARNING', 'ERROR'))
+    parser.add_argument('--connections', type=int, default=10)
+    parser.add_argument('--size', type=int, default=64, help='payload size in bytes')
+    parser.add_argument('--depth', type=int, default=1, help='frames in flight per connection')
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(args.log_level)
+
+    loop = asyncio.new_event_loop()
+    if args.mode == 'server':
+        stats = ServerStats()
+        server = loop.run_until_complete(
+            loop.create_server(functools.partial(FramedEchoServer, stats), *SERVER_ADDRESS))
+        install_stats_signal(loop, stats)
+        logging.getLogger('main').info('start up on {} port {}'.format(*SERVER_ADDRESS))
+        try:
+            loop.run_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            loop.run_until_complete(server.wait_closed())
+            dump_stats(stats)
+            loop.close()
+    else:
+        try:
+            print(json.dumps(loop.run_until_complete(run_load(
+                loop, FramedEchoClient, SERVER_ADDRESS, args.connections, args.size, args.depth, args.duration)),
+                indent=2))
+        finally:
+            loop.close()
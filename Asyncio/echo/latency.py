@@ -0,0 +1,92 @@
+# latency.py
+# Latency histogram and the load generator shared by echo_client.py and framed_echo.py.
+import asyncio
+import functools
+import time
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of latencies in microseconds.
+    Values are grouped by magnitude (power of two) and every magnitude is split into
+    2 ** precision_bits linear buckets, so the relative error of a recorded value is
+    below 1 / 2 ** (precision_bits - 1) while the memory used stays small and bounded.
+    """
+
+    def __init__(self, precision_bits=7):
+        self.precision_bits = precision_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def record(self, seconds):
+        value = max(0, int(seconds * 1e6))
+        shift = max(0, value.bit_length() - self.precision_bits)
+        key = (shift, value >> shift)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        """:type other LatencyHistogram"""
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, p):
+        """the value (microseconds) at or below which p percent of the recorded values fall"""
+        if not self.count:
+            return 0
+        rank = max(1, round(p / 100 * self.count))
+        seen = 0
+        for shift, bucket in sorted(self.counts, key=lambda key: key[1] << key[0]):
+            seen += self.counts[(shift, bucket)]
+            if seen >= rank:
+                # the middle of the bucket, clamped to the observed range
+                value = (bucket << shift) + ((1 << shift) >> 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self, percentiles=(50, 90, 99, 99.9)):
+        result = {'count': self.count,
+                  'min_us': self.min or 0,
+                  'mean_us': round(self.total / self.count, 1) if self.count else 0,
+                  'max_us': self.max or 0}
+        for p in percentiles:
+            result['p{}_us'.format(p)] = self.percentile(p)
+        return result
+
+
+async def run_load(loop, factory, address, connections, size, depth, duration):
+    """
+    drive the server at address with `connections` connections created by
+    factory(size, depth, deadline, histogram, future), return throughput and latency as a dict
+    :param address: (host, port) or the path of a unix domain socket
+    """
+    histogram = LatencyHistogram()
+    deadline = time.perf_counter() + duration
+    futures = []
+    time_start = time.perf_counter()
+    for _ in range(connections):
+        future = loop.create_future()
+        protocol_factory = functools.partial(factory, size, depth, deadline, histogram, future)
+        if isinstance(address, str):
+            await loop.create_unix_connection(protocol_factory, address)
+        else:
+            await loop.create_connection(protocol_factory, *address)
+        futures.append(future)
+    messages = sum(await asyncio.gather(*futures))
+    elapsed = time.perf_counter() - time_start
+    result = {'connections': connections, 'size': size, 'depth': depth, 'seconds': round(elapsed, 3),
+              'messages_per_second': round(messages / elapsed, 1),
+              'bytes_per_second': round(messages * size / elapsed, 1)}
+    result.update(histogram.summary())
+    return result
@@ -0,0 +1,77 @@
+# slow_client.py
+# A client that writes as fast as the server accepts data but reads its echoes slowly.
+# Without backpressure the server keeps reading and buffers every echo in memory;
+# with pause_writing/resume_writing its memory stays bounded by the write buffer watermarks.
+#
+# python echo_server.py --log-level INFO &
+# python slow_client.py --server-pid $! --duration 10
+
+import argparse
+import asyncio
+import socket
+import time
+
+SERVER_ADDRESS = ('localhost', 10000)
+
+
+def rss_kib(pid):
+    """resident set size of pid in KiB, read from /proc (Linux only)"""
+    try:
+        with open('/proc/{}/status'.format(pid)) as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+
+async def writer_loop(writer, counters, chunk):
+    while True:
+        writer.write(chunk)
+        # drain() waits while the transport buffer is above its high watermark, so this client
+        # only produces as fast as the kernel (and therefore the server) accepts data
+        await writer.drain()
+        counters['sent'] += len(chunk)
+
+
+async def reader_loop(reader, counters, read_size, delay):
+    while True:
+        data = await reader.read(read_size)
+        if not data:
+            break
+        counters['received'] += len(data)
+        await asyncio.sleep(delay)
+
+
+async def main(args):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    # a small receive buffer makes the slow reader visible to the server quickly
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, (socket.gethostbyname(SERVER_ADDRESS[0]), SERVER_ADDRESS[1]))
+    reader, writer = await asyncio.open_connection(sock=sock)
+
+    counters = {'sent': 0, 'received': 0}
+    tasks = [asyncio.ensure_future(writer_loop(writer, counters, b'x' * args.chunk)),
+             asyncio.ensure_future(reader_loop(reader, counters, args.read_size, args.delay))]
+    deadline = time.monotonic() + args.duration
+    while time.monotonic() < deadline and not any(task.done() for task in tasks):
+        await asyncio.wait(tasks, timeout=min(1, max(0, deadline - time.monotonic())))
+        if args.server_pid:
+            print('server rss = {} KiB'.format(rss_kib(args.server_pid)))
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print('sent {sent} bytes, received {received} bytes'.format(**counters))
+    writer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--server-pid', type=int, help='print the RSS of this process every second')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--chunk', type=int, default=64 * 1024, help='bytes per write')
+    parser.add_argument('--read-size', type=int, default=1024, help='bytes per read')
+    parser.add_argument('--delay', type=float, default=0.01, help='seconds to sleep after each read')
+    args = parser.parse_args()
+    asyncio.run(main(args))
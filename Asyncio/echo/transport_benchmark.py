@@ -0,0 +1,77 @@
+# transport_benchmark.py
+# Round trip latency of the echo server over TCP on localhost and over a unix domain socket.
+# Every connection keeps one message in flight (ping-pong), so the latency is dominated by
+# the transport; server and clients share one event loop.
+#
+# python transport_benchmark.py --connections 1 10 100 --size 256 --duration 3
+
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import socket
+import tempfile
+
+from echo_client import EchoLoadClient
+from echo_server import EchoServer, ServerStats
+from latency import run_load
+
+
+async def start_server(loop, transport, stats):
+    factory = functools.partial(EchoServer, stats)
+    if transport == 'unix':
+        path = os.path.join(tempfile.mkdtemp(), 'echo.sock')
+        return await loop.create_unix_server(factory, path), path
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        address = sock.getsockname()
+    return await loop.create_server(factory, *address), address
+
+
+async def measure(loop, transport, connections, size, depth, duration):
+    server, address = await start_server(loop, transport, ServerStats())
+    try:
+        result = await run_load(loop, EchoLoadClient, address, connections, size, depth, duration)
+    finally:
+        server.close()
+        await server.wait_closed()
+        if transport == 'unix':
+            os.unlink(address)
+            os.rmdir(os.path.dirname(address))
+    result['transport'] = transport
+    return result
+
+
+def print_table(results):
+    print('{:<10}{:>12}{:>14}{:>10}{:>10}{:>10}{:>10}'.format(
+        'transport', 'connections', 'messages/s', 'p50 us', 'p90 us', 'p99 us', 'max us'))
+    for result in results:
+        print('{transport:<10}{connections:>12}{messages_per_second:>14.0f}{p50_us:>10}{p90_us:>10}'
+              '{p99_us:>10}{max_us:>10}'.format(**result))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--size', type=int, default=256)
+    parser.add_argument('--depth', type=int, default=1, help='messages in flight per connection')
+    parser.add_argument('--duration', type=float, default=3)
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    loop = asyncio.new_event_loop()
+    results = []
+    try:
+        for connections in args.connections:
+            for transport in ('tcp', 'unix'):
+                results.append(loop.run_until_complete(
+                    measure(loop, transport, connections, args.size, args.depth, args.duration)))
+    finally:
+        loop.close()
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
@@ -1,16 +1,45 @@
-from flask import Flask
+from flask import Flask, current_app
 from flask_sqlalchemy import SQLAlchemy
-from config import Config
+from sqlalchemy import event
+from werkzeug.local import LocalProxy
+from config import Config, config as configs
+from .cache import ResponseCache, CredentialCache
+from .timing import Timings
 
 db = SQLAlchemy()
+# 缓存与耗时统计按应用保存在 app.extensions 中，同一个进程中创建多个应用时互不影响
+response_cache = LocalProxy(lambda: current_app.extensions['response_cache'])
+credential_cache = LocalProxy(lambda: current_app.extensions['credential_cache'])
+timings = LocalProxy(lambda: current_app.extensions['timings'])
 
 
-def create_app():
+def set_sqlite_pragmas(engine, pragmas):
+    """在每个新建立的连接上执行 PRAGMA，连接池中的连接只会执行一次"""
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute('PRAGMA {} = {}'.format(name, value))
+        cursor.close()
+
+
+def create_app(config=Config):
+    """:param config: 配置类，或 config.config 中的配置名，例如 'production'"""
+    if isinstance(config, str):
+        config = configs[config]
     app = Flask(__name__)
-    app.config.from_object(Config)
+    app.config.from_object(config)
 
-    Config.init_app(app)
+    config.init_app(app)
     db.init_app(app)
+    with app.app_context():
+        set_sqlite_pragmas(db.engine, app.config['SQLITE_PRAGMAS'])
+    ResponseCache().init_app(app)
+    CredentialCache().init_app(app)
+    Timings().init_app(app)
 
     from .api_1_0 import api as api_blueprint
     app.register_blueprint(api_blueprint, url_prefix='/api/v1.0')
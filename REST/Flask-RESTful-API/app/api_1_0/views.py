@@ -1,18 +1,32 @@
+import hashlib
+from itertools import islice
 from . import api
-from .. import db
-from flask import jsonify, abort, make_response, request, url_for
+from .. import db, response_cache, credential_cache, timings
+from flask import jsonify, abort, make_response, request, url_for, current_app, json, stream_with_context
 # jsonify -- 格式化响应给客户端的数据
 from app.models import Tasks
 from flask_httpauth import HTTPBasicAuth
+from sqlalchemy import text
+from sqlalchemy.orm import load_only
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.security import check_password_hash
 
 auth = HTTPBasicAuth()
 
 
-@auth.get_password
-def get_password(username):
-    if username == 'ok':
-        return 'python'
-    return None
+@auth.verify_password
+def verify_password(username, password):
+    with timings.phase('auth'):
+        password_hash = current_app.config['API_USERS'].get(username)
+        if password_hash is None:
+            return False
+        # 计算加盐哈希的代价很高，短时间内重复验证同一凭据时直接使用缓存的结果
+        if credential_cache.contains(username, password, password_hash):
+            return username
+        if not check_password_hash(password_hash, password):
+            return False
+        credential_cache.add(username, password, password_hash)
+        return username
 
 
 @auth.error_handler
@@ -20,27 +34,197 @@ def unauthorized():
     return make_response(jsonify({'error': 'Unauthorized access'}), 401)
 
 
-def make_public_task(task):
-    new_task = {'uri': url_for('api.get_task', task_id=task.id, _external=True),
-                'title': task.title,
-                'description': task.description,
-                'done': task.done}
+# fields= 参数可选的字段，以及每个字段需要从数据库中读取的列
+PUBLIC_FIELDS = {
+    'uri': 'id',
+    'title': 'title',
+    'description': 'description',
+    'done': 'done',
+}
+
+
+def parse_fields():
+    """解析 fields=title,done 形式的字段投影参数，未指定时返回全部字段"""
+    fields = request.args.get('fields')
+    if not fields:
+        return list(PUBLIC_FIELDS)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    if not fields or any(field not in PUBLIC_FIELDS for field in fields):
+        abort(400)
+    return fields
+
+
+def parse_after():
+    """解析 after 参数，after 为上一页最后一个任务的 id"""
+    after = request.args.get('after', 0, type=int)
+    if after < 0:
+        abort(400)
+    return after
+
+
+def parse_page():
+    """解析 limit/after 分页参数"""
+    limit = request.args.get('limit', current_app.config['TASKS_PER_PAGE'], type=int)
+    if limit < 1:
+        abort(400)
+    return min(limit, current_app.config['TASKS_MAX_PER_PAGE']), parse_after()
+
+
+def prefix_upper_bound(prefix):
+    """
+    以 prefix 开头的字符串都小于返回值(SQLite 按 UTF-8 字节比较，与码位顺序一致)，不存在上界时返回 None
+    末尾的 U+10FFFF 无法加一，去掉后向前进位；加一时跳过代理区 U+D800-U+DFFF
+    """
+    prefix = prefix.rstrip('\U0010ffff')
+    if not prefix:
+        return None
+    code = ord(prefix[-1]) + 1
+    if 0xD800 <= code <= 0xDFFF:
+        code = 0xE000
+    return prefix[:-1] + chr(code)
+
+
+def filter_tasks(query):
+    """
+    按查询参数过滤任务：done=true/false，title=前缀，description=子串
+    """
+    done = request.args.get('done')
+    if done is not None:
+        if done.lower() not in ('true', 'false', '1', '0'):
+            abort(400)
+        query = query.filter(Tasks.done == (done.lower() in ('true', '1')))
+    title = request.args.get('title')
+    if title:
+        # 用范围比较代替 LIKE 'prefix%'，可以使用 title 上的索引，并且与 LIKE 不同，区分大小写
+        query = query.filter(Tasks.title >= title)
+        upper = prefix_upper_bound(title)
+        if upper is not None:
+            query = query.filter(Tasks.title < upper)
+    description = request.args.get('description')
+    if description:
+        # trigram 分词至少需要 3 个字符，更短的子串只能扫描全表
+        if current_app.config['TASKS_FTS'] and len(description) >= 3:
+            match = text('SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH :pattern') \
+                .bindparams(pattern='"{}"'.format(description.replace('"', '""')))
+            query = query.filter(Tasks.id.in_(match))
+        else:
+            query = query.filter(Tasks.description.contains(description, autoescape=True))
+    return query
+
+
+def project_task(task, fields):
+    """只生成请求的字段，未加载的列不会被访问，避免逐行触发延迟加载"""
+    new_task = {}
+    for field in fields:
+        if field == 'uri':
+            new_task['uri'] = url_for('api.get_task', task_id=task.id, _external=True)
+        else:
+            new_task[field] = getattr(task, field)
     return new_task
 
 
+def cached_json(key, etag, build):
+    """
+    带 ETag 的 JSON 响应：If-None-Match 命中时返回 304，否则优先使用缓存的响应体
+    缓存键中包含了 ETag(即数据的版本)，数据变化后旧的缓存项不会再被命中
+    :type build function 缓存未命中时调用，返回需要序列化的数据
+    """
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        body = response_cache.get(key)
+        if body is None:
+            data = build()
+            with timings.phase('jsonify'):
+                body = jsonify(data).get_data()
+            response_cache.set(key, body)
+        response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    return response
+
+
+def stream_tasks(after, fields):
+    """
+    流式返回 id > after 的全部任务：以 yield_per 分批从数据库读取，每批序列化后立即写出
+    内存占用只与批大小有关，且在查询完成之前就开始发送响应
+    """
+    batch_size = current_app.config['TASKS_STREAM_BATCH']
+    columns = {getattr(Tasks, PUBLIC_FIELDS[field]) for field in fields} | {Tasks.id}
+    query = filter_tasks(Tasks.query.options(load_only(*columns))) \
+        .filter(Tasks.id > after) \
+        .order_by(Tasks.id) \
+        .yield_per(batch_size)
+
+    def generate():
+        yield '{"tasks": ['
+        tasks = iter(query)
+        separator = ''
+        while True:
+            batch = [json.dumps(project_task(task, fields)) for task in islice(tasks, batch_size)]
+            if not batch:
+                break
+            yield separator + ','.join(batch)
+            separator = ','
+        yield '], "next": null}'
+
+    return current_app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+
 @api.route('/tasks', methods=['GET'])
 @auth.login_required
 def index():
-    tasks = Tasks.query.all()
-    return jsonify({'tasks': list(map(make_public_task, tasks))})
+    if request.args.get('stream', 0, type=int):
+        return stream_tasks(parse_after(), parse_fields())
+    # 基于主键的游标分页(keyset pagination)：WHERE id > after ORDER BY id LIMIT n
+    # 只扫描主键索引上的一小段，耗时不随表的大小增长
+    limit, after = parse_page()
+    fields = parse_fields()
+    # 先只查询本页的 id 和 version 生成 ETag，多取一行用于判断是否还有下一页
+    with timings.phase('db'):
+        versions = filter_tasks(db.session.query(Tasks.id, Tasks.version)) \
+            .filter(Tasks.id > after) \
+            .order_by(Tasks.id) \
+            .limit(limit + 1) \
+            .all()
+    has_next = len(versions) > limit
+    versions = versions[:limit]
+    ids = [task_id for task_id, _ in versions]
+    next_after = ids[-1] if has_next else None
+    etag = hashlib.sha1('{};{};{}'.format(
+        ','.join(fields), next_after,
+        ','.join('{}:{}'.format(*v) for v in versions)).encode()).hexdigest()
+
+    def build():
+        columns = {getattr(Tasks, PUBLIC_FIELDS[field]) for field in fields} | {Tasks.id}
+        with timings.phase('db'):
+            tasks = Tasks.query.options(load_only(*columns)) \
+                .filter(Tasks.id.in_(ids)) \
+                .order_by(Tasks.id) \
+                .all() if ids else []
+        with timings.phase('serialize'):
+            return {'tasks': [project_task(task, fields) for task in tasks],
+                    'next': next_after}
+
+    return cached_json(('tasks', request.host_url, etag), etag, build)
 
 
 @api.route('/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
-    task = Tasks.query.filter_by(id=task_id).first()
-    if not task:
+    with timings.phase('db'):
+        version = db.session.query(Tasks.version).filter_by(id=task_id).scalar()
+    if version is None:
         abort(404)
-    return jsonify({'task': task.get_json()})
+    etag = '{}-{}'.format(task_id, version)
+
+    def build():
+        with timings.phase('db'):
+            task = Tasks.query.filter_by(id=task_id).first()
+        if not task:
+            abort(404)
+        with timings.phase('serialize'):
+            return {'task': task.get_json()}
+
+    return cached_json(('task', etag), etag, build)
 
 
 @api.route('/tasks', methods=['POST'])
@@ -50,41 +234,152 @@ def create_task():
     task = Tasks(title=request.json['title'],
                  description=request.json.get('description', ''),
                  done=False)
-    db.session.add(task)
-    db.session.commit()
+    with timings.phase('db'):
+        db.session.add(task)
+        db.session.commit()
+    response_cache.clear()
     return jsonify({'task': task.get_json()})
 
 
+def validate_task_json(data):
+    """检查 title/description/done 字段的类型，更新任务与批量操作共用同一套规则"""
+    if type(data) is not dict:
+        return False
+    if 'title' in data and type(data['title']) is not str:
+        return False
+    if 'description' in data and type(data['description']) is not str:
+        return False
+    if 'done' in data and type(data['done']) is not bool:
+        return False
+    return True
+
+
 @api.route('/tasks/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
-    task = Tasks.query.filter_by(id=task_id).first()
+    with timings.phase('db'):
+        task = Tasks.query.filter_by(id=task_id).first()
     if not task:
         abort(404)
-    if not request.json:
-        abort(400)
-    if 'title' in request.json and type(request.json['title']) is not str:
-        abort(400)
-    if 'description' in request.json and type(request.json['description']) is not str:
-        abort(400)
-    if 'done' in request.json and type(request.json['done']) is not bool:
+    if not request.json or not validate_task_json(request.json):
         abort(400)
     task.title = request.json.get('title', task.title)
     task.description = request.json.get('description', task.description)
     task.done = request.json.get('done', task.done)
-    db.session.commit()
+    with timings.phase('db'):
+        db.session.commit()
+    response_cache.clear()
     return jsonify({'task': task.get_json()})
 
 
 @api.route('/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
-    task = Tasks.query.filter_by(id=task_id).first()
+    with timings.phase('db'):
+        task = Tasks.query.filter_by(id=task_id).first()
+        if not task:
+            abort(404)
+        db.session.delete(task)
+        db.session.commit()
+    response_cache.clear()
+    return jsonify({'result': True})
+
+
+def apply_operation(operation, tasks):
+    """
+    执行单个批量操作，返回 (状态码, 任务对象或错误信息)
+    :type operation dict
+    :type tasks dict 本批次涉及的已有任务，id -> Tasks
+    """
+    if type(operation) is not dict or not validate_task_json(operation):
+        return 400, 'Bad Request'
+    op = operation.get('op')
+    if op == 'create':
+        if 'title' not in operation:
+            return 400, 'Bad Request'
+        task = Tasks(title=operation['title'],
+                     description=operation.get('description', ''),
+                     done=False)
+        db.session.add(task)
+        return 201, task
+    if op not in ('update', 'delete') or type(operation.get('id')) is not int:
+        return 400, 'Bad Request'
+    task = tasks.get(operation['id'])
     if not task:
-        abort(404)
+        return 404, 'Not Found'
+    if op == 'update':
+        task.title = operation.get('title', task.title)
+        task.description = operation.get('description', task.description)
+        task.done = operation.get('done', task.done)
+        return 200, task
     db.session.delete(task)
+    # 同一批次中重复删除同一个任务时返回 404
+    del tasks[task.id]
+    return 200, None
+
+
+@api.route('/tasks/batch', methods=['POST'])
+def batch_tasks():
+    """
+    批量创建/更新/删除任务，所有操作在同一个事务中提交，任一操作失败则全部回滚
+    请求体：{"operations": [{"op": "create", "title": "..."},
+                           {"op": "update", "id": 1, "done": true},
+                           {"op": "delete", "id": 2}]}
+    """
+    if type(request.json) is not dict or type(request.json.get('operations')) is not list:
+        abort(400)
+    operations = request.json['operations']
+    if not operations or len(operations) > current_app.config['TASKS_MAX_BATCH']:
+        abort(400)
+
+    # 用一条 IN 查询取出本批次涉及的全部任务，而不是逐条查询
+    ids = {operation.get('id') for operation in operations
+           if type(operation) is dict and type(operation.get('id')) is int}
+    tasks = {task.id: task for task in Tasks.query.filter(Tasks.id.in_(ids))} if ids else {}
+
+    results = [apply_operation(operation, tasks) for operation in operations]
+    if any(status >= 400 for status, _ in results):
+        db.session.rollback()
+        # 整个批次已回滚，本身成功的操作也没有生效，标记为 424
+        return make_response(jsonify({'results': [
+            {'status': status, 'error': value} if status >= 400 else {'status': 424, 'error': 'Failed Dependency'}
+            for status, value in results
+        ]}), 400)
+
+    # 一次 flush 为新建的任务分配 id，一次 commit 完成整个批次
+    db.session.flush()
+    body = {'results': [
+        {'status': status, 'task': value.get_json() if value is not None else None}
+        for status, value in results
+    ]}
     db.session.commit()
-    return jsonify({'result': True})
+    response_cache.clear()
+    return jsonify(body)
+
+
+@api.before_request
+def start_timing():
+    timings.start()
+
+
+@api.after_request
+def finish_timing(response):
+    return timings.finish(response)
+
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """各阶段耗时的直方图，单位毫秒；未开启 TIMING_ENABLED 时返回 404"""
+    if not timings.enabled:
+        abort(404)
+    return jsonify({'timings': timings.snapshot()})
 
 
 @api.app_errorhandler(404)
 def page_not_found(error):
     return make_response(jsonify({'error': "Not Found"}), 404)
+
+
+@api.app_errorhandler(StaleDataError)
+def conflict(error):
+    # 更新或删除的任务已被并发的请求删除
+    db.session.rollback()
+    return make_response(jsonify({'error': 'Conflict'}), 409)
@@ -0,0 +1,96 @@
+import hashlib
+import hmac
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+
+class ResponseCache:
+    """进程内的 LRU 缓存，保存已经序列化好的 JSON 响应体"""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('RESPONSE_CACHE_SIZE', self.maxsize)
+        app.extensions['response_cache'] = self
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class CredentialCache:
+    """
+    最近验证通过的凭据缓存，容量有限且每项在 ttl 秒后过期
+    只保存以 SECRET_KEY 为密钥的 HMAC 摘要，不保存明文密码；
+    摘要中包含了存储的密码哈希，修改密码后旧的缓存项自然失效
+    """
+
+    def __init__(self, maxsize=1024, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.secret = b''
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('AUTH_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('AUTH_CACHE_TTL', self.ttl)
+        self.secret = app.config['SECRET_KEY'].encode()
+        app.extensions['credential_cache'] = self
+
+    def _digest(self, username, password, password_hash):
+        message = '\0'.join([username, password, password_hash]).encode()
+        return hmac.new(self.secret, message, hashlib.sha256).digest()
+
+    def contains(self, username, password, password_hash):
+        if self.maxsize <= 0:
+            return False
+        key = self._digest(username, password, password_hash)
+        with self._lock:
+            expires = self._data.get(key)
+            if expires is None:
+                return False
+            if expires < monotonic():
+                del self._data[key]
+                return False
+            return True
+
+    def add(self, username, password, password_hash):
+        if self.maxsize <= 0:
+            return
+        key = self._digest(username, password, password_hash)
+        with self._lock:
+            self._data[key] = monotonic() + self.ttl
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
@@ -1,12 +1,24 @@
 from . import db
+from sqlalchemy import text
 
 
 class Tasks(db.Model):
     __tablename__ = 'tasks'
     id = db.Column(db.Integer, primary_key=True)
-    title = db.Column(db.String(10))
+    title = db.Column(db.String(10), index=True)
     description = db.Column(db.String(64))
     done = db.Column(db.Boolean, default=False)
+    # 每次 UPDATE 时在同一条语句中加一，用于生成 ETag
+    # 只是数据的版本号，不做乐观锁检查，并发更新同一个任务时仍然是最后一次写入生效
+    version = db.Column(db.Integer, nullable=False, default=1,
+                        onupdate=db.literal_column('version + 1'))
+
+    # done=? 过滤后仍按 id 做游标分页，(done, id) 组合索引可以直接按顺序扫描
+    # 禁止 SQLite 复用已删除任务的 id，保证 (id, version) 不会重复出现
+    __table_args__ = (
+        db.Index('ix_tasks_done_id', 'done', 'id'),
+        {'sqlite_autoincrement': True},
+    )
 
     @staticmethod
     def init():
@@ -32,6 +44,41 @@ class Tasks(db.Model):
             db.session.add(task)
         db.session.commit()
 
+    @staticmethod
+    def seed(n, batch_size=10000):
+        """批量插入 n 条测试任务，每批使用一条 executemany 语句，最后统一提交"""
+        for start in range(0, n, batch_size):
+            db.session.execute(Tasks.__table__.insert(), [
+                {'title': 'task {}'.format(i)[:10],
+                 'description': 'description of task {}'.format(i),
+                 'done': i % 2 == 0,
+                 'version': 1}
+                for i in range(start, min(n, start + batch_size))
+            ])
+        db.session.commit()
+
+    @staticmethod
+    def create_fts():
+        """
+        创建 description 的 FTS5 全文索引(trigram 分词，支持子串匹配，需要 SQLite 3.34+)，
+        并通过触发器与 tasks 表保持同步；创建后需要在配置中设置 TASKS_FTS = True
+        """
+        statements = [
+            "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+            "description, content='tasks', content_rowid='id', tokenize='trigram')",
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN "
+            "INSERT INTO tasks_fts(rowid, description) VALUES (new.id, new.description); END",
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, description) VALUES ('delete', old.id, old.description); END",
+            "CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF description ON tasks BEGIN "
+            "INSERT INTO tasks_fts(tasks_fts, rowid, description) VALUES ('delete', old.id, old.description); "
+            "INSERT INTO tasks_fts(rowid, description) VALUES (new.id, new.description); END",
+            "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+        ]
+        for statement in statements:
+            db.session.execute(text(statement))
+        db.session.commit()
+
     def get_json(self):
         return {
             'id': self.id,
@@ -0,0 +1,96 @@
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+
+from flask import g
+
+
+class _NullPhase:
+    """关闭统计时使用的空上下文管理器，不产生任何开销"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_PHASE = _NullPhase()
+
+
+class _Phase:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        timings = g.timings
+        timings[self.name] = timings.get(self.name, 0.0) + perf_counter() - self.start
+        return False
+
+
+class Timings:
+    """
+    按阶段(auth、db、serialize、jsonify)统计每个请求的耗时：
+    写入 Server-Timing 响应头，并汇总到进程内的直方图中
+    """
+    # 直方图各个桶的上限，单位毫秒
+    BUCKETS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+    def __init__(self):
+        self.enabled = False
+        self._histograms = {}
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('TIMING_ENABLED', False)
+        app.extensions['timings'] = self
+
+    def phase(self, name):
+        if not self.enabled or 'timings' not in g:
+            return NULL_PHASE
+        return _Phase(name)
+
+    def start(self):
+        if self.enabled:
+            g.timings = {}
+            g.timings_start = perf_counter()
+
+    def finish(self, response):
+        if not self.enabled or 'timings' not in g:
+            return response
+        timings = dict(g.timings, total=perf_counter() - g.timings_start)
+        response.headers['Server-Timing'] = ', '.join(
+            '{};dur={:.3f}'.format(name, seconds * 1000) for name, seconds in timings.items())
+        self.observe(timings)
+        return response
+
+    def observe(self, timings):
+        with self._lock:
+            for name, seconds in timings.items():
+                milliseconds = seconds * 1000
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = {'count': 0, 'sum': 0.0,
+                                                          'buckets': [0] * len(self.BUCKETS)}
+                histogram['count'] += 1
+                histogram['sum'] += milliseconds
+                histogram['buckets'][bisect_left(self.BUCKETS, milliseconds)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {name: {
+                'count': histogram['count'],
+                'sum_ms': round(histogram['sum'], 3),
+                # [上限, 落在该桶中的次数]，按上限从小到大排列
+                'buckets_ms': [[str(bound), count] for bound, count in zip(self.BUCKETS, histogram['buckets'])],
+            } for name, histogram in self._histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
@@ -0,0 +1,117 @@
+# 以 asyncio(ASGI) 方式运行同一套接口：
+# 事件循环负责网络 I/O，视图函数(包括 SQLite 查询)在有界线程池中执行，不会阻塞事件循环
+# > uvicorn asgi:application
+import asyncio
+import contextvars
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from app import create_app
+
+
+class AsgiAdapter:
+    """把 Flask(WSGI) 应用包装为 ASGI 应用，同一时刻最多有 max_workers 个请求在访问数据库"""
+
+    def __init__(self, wsgi_app, max_workers):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='asgi-db')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError('Unsupported scope type: {}'.format(scope['type']))
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        loop = asyncio.get_running_loop()
+        environ = self.build_environ(scope, bytes(body))
+        # Flask 的请求上下文保存在 contextvars 中，同一个请求的各次调用可能落在不同的线程上，
+        # 因此都在同一个 Context 中执行，流式响应的生成器才能访问到请求上下文
+        context = contextvars.Context()
+        response, iterable, iterator, chunk = await loop.run_in_executor(
+            self.executor, context.run, self.start, environ)
+        try:
+            await send({'type': 'http.response.start',
+                        'status': response['status'],
+                        'headers': [(name.lower().encode('latin1'), value.encode('latin1'))
+                                    for name, value in response['headers']]})
+            # 流式响应的每一块也在线程池中生成
+            while chunk is not None:
+                if chunk:
+                    await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                chunk = await loop.run_in_executor(self.executor, context.run, next, iterator, None)
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            if hasattr(iterable, 'close'):
+                await loop.run_in_executor(self.executor, context.run, iterable.close)
+
+    def start(self, environ):
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = headers
+
+        iterable = self.wsgi_app(environ, start_response)
+        iterator = iter(iterable)
+        # start_response 可能在取出第一块数据时才被调用
+        chunk = next(iterator, None)
+        return response, iterable, iterator, chunk
+
+    @staticmethod
+    def build_environ(scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode('latin1'),
+            'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope['query_string'].decode('latin1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': 'HTTP/{}'.format(scope.get('http_version', '1.1')),
+            'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope['headers']:
+            name = name.decode('latin1').upper().replace('-', '_')
+            value = value.decode('latin1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[name] = value
+                continue
+            key = 'HTTP_' + name
+            environ[key] = environ[key] + ',' + value if key in environ else value
+        # 请求体已经完整读入，分块传输的请求没有 Content-Length，否则 Werkzeug 会把它当作空请求体
+        environ['CONTENT_LENGTH'] = str(len(body))
+        environ['wsgi.input_terminated'] = True
+        return environ
+
+
+app = create_app(os.getenv('FLASK_CONFIG') or 'default')
+application = AsgiAdapter(app, app.config['ASGI_THREADS'])
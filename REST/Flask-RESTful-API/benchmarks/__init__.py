@@ -0,0 +1,2 @@
+# 性能测试脚本，在项目根目录下以模块方式运行，例如：
+# > python -m benchmarks.batch
@@ -0,0 +1,124 @@
+# 任务接口的压测：批量写入 N 条任务，然后由多个并发客户端按比例发送 GET/POST/PUT/DELETE 请求，
+# 以 JSON 输出吞吐量与 p50/p95/p99 延迟，便于在不同提交之间比较
+# > python -m benchmarks.api -n 100000 -c 16 -d 10 --mix get=60,list=20,post=10,put=5,delete=5
+import argparse
+import base64
+import json
+import os
+import random
+import subprocess
+import tempfile
+
+from app import create_app, db
+from app.models import Tasks
+from config import config as configs
+from benchmarks.load import drive, http_client, test_client, wsgi_server, asgi_server, free_port
+
+HEADERS = {'Authorization': 'Basic ' + base64.b64encode(b'ok:python').decode()}
+DEFAULT_MIX = 'get=60,list=20,post=10,put=5,delete=5'
+
+
+def parse_mix(mix):
+    """把 get=60,list=20 解析为 [('get', 60), ('list', 20)]"""
+    operations = []
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        if name not in ('get', 'list', 'post', 'put', 'delete'):
+            raise ValueError('Unknown operation: {}'.format(name))
+        operations.append((name, float(weight or 1)))
+    return operations
+
+
+def workload(mix, n_tasks):
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+
+    def next_request(n):
+        rnd = random.Random(n)
+
+        def make_request():
+            operation = rnd.choices(names, weights)[0]
+            task_id = rnd.randint(1, n_tasks)
+            if operation == 'get':
+                return 'GET', '/api/v1.0/tasks/{}'.format(task_id), None, {}
+            if operation == 'list':
+                return 'GET', '/api/v1.0/tasks?after={}'.format(task_id), None, HEADERS
+            if operation == 'post':
+                return 'POST', '/api/v1.0/tasks', {'title': 'bench', 'description': 'benchmark'}, {}
+            if operation == 'put':
+                return 'PUT', '/api/v1.0/tasks/{}'.format(task_id), {'done': rnd.random() < 0.5}, {}
+            return 'DELETE', '/api/v1.0/tasks/{}'.format(task_id), None, {}
+        return make_request
+    return next_request
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(tasks=10000, concurrency=16, duration=10.0, mix=DEFAULT_MIX, server='client',
+                  config='default', database=None):
+    """
+    :param server: client 使用 Flask 测试客户端，wsgi/asgi 在子进程中启动本地服务器
+    :param database: SQLite 数据库文件路径，默认在临时目录中新建
+    """
+    database = database or os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite')
+
+    class BenchmarkConfig(configs[config]):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + database
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        Tasks.seed(tasks)
+
+    next_request = workload(parse_mix(mix), tasks)
+    if server == 'client':
+        result = drive(test_client(app), next_request, concurrency, duration)
+    else:
+        port = free_port()
+        start = wsgi_server if server == 'wsgi' else asgi_server
+        process = start(port, {'DATABASE_URL': BenchmarkConfig.SQLALCHEMY_DATABASE_URI, 'FLASK_CONFIG': config})
+        try:
+            result = drive(http_client('127.0.0.1', port), next_request, concurrency, duration)
+        finally:
+            process.terminate()
+            process.wait()
+
+    result.update({
+        'revision': git_revision(),
+        'server': server,
+        'config': config,
+        'tasks': tasks,
+        'concurrency': concurrency,
+        'duration': duration,
+        'mix': mix,
+    })
+    return result
+
+
+def add_arguments(parser):
+    parser.add_argument('-n', '--tasks', type=int, default=10000, help='number of tasks to seed')
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='number of concurrent clients')
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='seconds to run')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='weights of get/list/post/put/delete')
+    parser.add_argument('--server', choices=('client', 'wsgi', 'asgi'), default='client')
+    parser.add_argument('--config', choices=sorted(configs), default='default')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    parser.add_argument('-o', '--output', help='write the JSON result to this file')
+    args = parser.parse_args()
+    result = run_benchmark(args.tasks, args.concurrency, args.duration, args.mix, args.server, args.config)
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
@@ -0,0 +1,61 @@
+# 对比 WSGI(werkzeug 多线程服务器)与 ASGI(uvicorn + asgi.py)的吞吐量与延迟，需要安装 uvicorn
+import argparse
+import base64
+import json
+import os
+import random
+import tempfile
+
+from app import create_app, db
+from app.models import Tasks
+from config import Config
+from benchmarks.load import drive, http_client, wsgi_server, asgi_server, free_port
+
+HEADERS = {'Authorization': 'Basic ' + base64.b64encode(b'ok:python').decode()}
+
+
+def seed(path, n):
+    class SeedConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + path
+    app = create_app(SeedConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        Tasks.init()
+        Tasks.seed(n)
+
+
+def reads(n_tasks):
+    def next_request(n):
+        rnd = random.Random(n)
+
+        def make_request():
+            if rnd.random() < 0.5:
+                return 'GET', '/api/v1.0/tasks/{}'.format(rnd.randint(1, n_tasks)), None, {}
+            return 'GET', '/api/v1.0/tasks?after={}'.format(rnd.randint(0, n_tasks)), None, HEADERS
+        return make_request
+    return next_request
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', '--tasks', type=int, default=10000)
+    parser.add_argument('-c', '--concurrency', type=int, default=32)
+    parser.add_argument('-d', '--duration', type=float, default=10)
+    parser.add_argument('--config', default='production')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite')
+    seed(path, args.tasks)
+    env = {'DATABASE_URL': 'sqlite:///' + path, 'FLASK_CONFIG': args.config}
+    results = {}
+    for name, start in (('wsgi', wsgi_server), ('asgi', asgi_server)):
+        port = free_port()
+        server = start(port, env)
+        try:
+            results[name] = drive(http_client('127.0.0.1', port), reads(args.tasks),
+                                  args.concurrency, args.duration)
+        finally:
+            server.terminate()
+            server.wait()
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,42 @@
+# 对比开启与关闭凭据缓存时，每个认证请求的开销
+import argparse
+import base64
+import os
+import tempfile
+from time import perf_counter
+
+from app import create_app, db
+from app.models import Tasks
+from config import Config
+
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite')
+
+
+class NoCacheConfig(BenchmarkConfig):
+    AUTH_CACHE_SIZE = 0
+
+
+def run(name, config, n):
+    app = create_app(config)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        Tasks.init()
+        client = app.test_client()
+        headers = {'Authorization': 'Basic ' + base64.b64encode(b'ok:python').decode()}
+        time_start = perf_counter()
+        for _ in range(n):
+            response = client.get('/api/v1.0/tasks', headers=headers)
+            assert response.status_code == 200
+        elapsed = perf_counter() - time_start
+    print('{:<10} {:>6} requests in {:.3f} seconds, {:.3f} ms/request'.format(name, n, elapsed, elapsed / n * 1000))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=200, help='number of requests')
+    args = parser.parse_args()
+    run('no cache', NoCacheConfig, args.n)
+    run('cache', BenchmarkConfig, args.n)
@@ -0,0 +1,57 @@
+# 对比逐条 POST/PUT/DELETE 与 /tasks/batch 批量接口的吞吐量
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+from app import create_app, db
+from config import Config
+
+
+class BenchmarkConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite')
+    TASKS_MAX_BATCH = 1000
+
+
+def per_item(client, n):
+    for i in range(n):
+        client.post('/api/v1.0/tasks', json={'title': 'task {}'.format(i)})
+    for task_id in range(1, n + 1):
+        client.put('/api/v1.0/tasks/{}'.format(task_id), json={'done': True})
+    for task_id in range(1, n + 1):
+        client.delete('/api/v1.0/tasks/{}'.format(task_id))
+
+
+def batched(client, n, size):
+    def send(operations):
+        for start in range(0, len(operations), size):
+            response = client.post('/api/v1.0/tasks/batch', json={'operations': operations[start:start + size]})
+            assert response.status_code == 200, response.json
+            yield from response.json['results']
+
+    ids = [result['task']['id'] for result in
+           send([{'op': 'create', 'title': 'task {}'.format(i)} for i in range(n)])]
+    list(send([{'op': 'update', 'id': task_id, 'done': True} for task_id in ids]))
+    list(send([{'op': 'delete', 'id': task_id} for task_id in ids]))
+
+
+def run(name, func, *args):
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        client = app.test_client()
+        time_start = perf_counter()
+        func(client, *args)
+        elapsed = perf_counter() - time_start
+    operations = args[0] * 3
+    print('{:<10} {:>8} ops in {:.3f} seconds, {:.0f} ops/s'.format(name, operations, elapsed, operations / elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-n', type=int, default=1000, help='number of tasks')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    run('per-item', per_item, args.n)
+    run('batch', batched, args.n, args.batch_size)
@@ -0,0 +1,67 @@
+# 多线程并发读写，对比默认配置与 ProductionConfig(WAL 等 PRAGMA 与连接池)的吞吐量和锁错误数
+import argparse
+import base64
+import logging
+import os
+import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from app import create_app, db
+from app.models import Tasks
+from config import Config, ProductionConfig
+
+HEADERS = {'Authorization': 'Basic ' + base64.b64encode(b'ok:python').decode()}
+
+
+def benchmark_config(base):
+    class BenchmarkConfig(base):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite')
+    return BenchmarkConfig
+
+
+def client_worker(app, requests, write_ratio, seed):
+    rnd = random.Random(seed)
+    client = app.test_client()
+    errors = conflicts = 0
+    for i in range(requests):
+        if rnd.random() < write_ratio:
+            response = client.put('/api/v1.0/tasks/{}'.format(rnd.randint(1, 2)), json={'done': bool(i % 2)})
+        else:
+            response = client.get('/api/v1.0/tasks', headers=HEADERS)
+        if response.status_code == 409:
+            conflicts += 1
+        elif response.status_code >= 500:
+            errors += 1
+    return errors, conflicts
+
+
+def run(name, config, clients, requests, write_ratio):
+    app = create_app(benchmark_config(config))
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        Tasks.init()
+    time_start = perf_counter()
+    with ThreadPoolExecutor(clients) as executor:
+        results = list(executor.map(client_worker, [app] * clients, [requests] * clients,
+                                    [write_ratio] * clients, range(clients)))
+    elapsed = perf_counter() - time_start
+    total = clients * requests
+    errors = sum(result[0] for result in results)
+    conflicts = sum(result[1] for result in results)
+    print('{:<12} {:>6} requests in {:.3f} seconds, {:.0f} requests/s, {} errors, {} conflicts'.format(
+        name, total, elapsed, total / elapsed, errors, conflicts))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-c', '--clients', type=int, default=16)
+    parser.add_argument('-n', '--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('-w', '--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+    # 锁错误会以 500 响应计数，不需要逐条打印异常
+    logging.getLogger('app').disabled = True
+    run('default', Config, args.clients, args.requests, args.write_ratio)
+    run('production', ProductionConfig, args.clients, args.requests, args.write_ratio)
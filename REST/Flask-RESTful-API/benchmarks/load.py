@@ -0,0 +1,133 @@
+# 基于 http.client 的简单压测工具：多个线程各自保持一个连接，循环发送请求并记录延迟
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+from time import perf_counter, sleep
+
+BASEDIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, p):
+    """values 需要已经排好序"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies, elapsed, errors=0):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def http_client(host, port):
+    """返回一个创建 http.client 客户端的函数，每个客户端线程各自保持一个连接"""
+    def connect():
+        connection = http.client.HTTPConnection(host, port)
+
+        def send(method, path, body, headers):
+            try:
+                connection.request(method, path, body=json.dumps(body) if body is not None else None,
+                                   headers=dict(headers, **{'Content-Type': 'application/json'}))
+                response = connection.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                connection.close()
+                return None
+        return send
+    return connect
+
+
+def test_client(app):
+    """返回一个创建 Flask 测试客户端的函数，不经过网络，在当前进程中直接调用应用"""
+    def connect():
+        client = app.test_client()
+
+        def send(method, path, body, headers):
+            return client.open(path, method=method, json=body, headers=headers).status_code
+        return send
+    return connect
+
+
+def drive(connect, next_request, concurrency, duration):
+    """
+    启动 concurrency 个客户端线程，在 duration 秒内不断发送请求
+    :type connect function 每个线程调用一次，返回 send(method, path, body, headers) -> 状态码
+    :type next_request function 参数为客户端编号，返回一个生成 (method, path, body, headers) 的函数
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = perf_counter() + duration
+
+    def client(n):
+        send = connect()
+        make_request = next_request(n)
+        own_latencies, own_errors = [], 0
+        while perf_counter() < deadline:
+            method, path, body, headers = make_request()
+            time_start = perf_counter()
+            status = send(method, path, body, headers)
+            if status is None or status >= 500:
+                own_errors += 1
+                continue
+            own_latencies.append(perf_counter() - time_start)
+        with lock:
+            latencies.extend(own_latencies)
+            errors[0] += own_errors
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    time_start = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, perf_counter() - time_start, errors[0])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, port, env):
+    """在子进程中启动服务器，等待端口可以连接后返回 Popen 对象"""
+    process = subprocess.Popen([sys.executable] + args, cwd=BASEDIR, env=dict(os.environ, **env),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError('server exited with code {}'.format(process.returncode))
+            sleep(0.1)
+    process.kill()
+    raise RuntimeError('server did not start on port {}'.format(port))
+
+
+def wsgi_server(port, env):
+    """werkzeug 的多线程 WSGI 服务器"""
+    code = ("import os; from werkzeug.serving import run_simple; from app import create_app; "
+            "run_simple('127.0.0.1', {}, create_app(os.getenv('FLASK_CONFIG') or 'default'), threaded=True)")
+    return start_server(['-c', code.format(port)], port, env)
+
+
+def asgi_server(port, env):
+    """uvicorn 运行的 ASGI 服务器"""
+    return start_server(['-m', 'uvicorn', 'asgi:application', '--host', '127.0.0.1', '--port', str(port),
+                         '--log-level', 'warning', '--no-access-log'], port, env)
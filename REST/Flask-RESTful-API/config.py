@@ -1,4 +1,6 @@
 import os
+from sqlalchemy.pool import QueuePool
+from werkzeug.security import generate_password_hash
 
 basedir = os.path.abspath(os.path.dirname(__file__))
 
@@ -6,8 +8,52 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 class Config:
     SECRET_KEY = 'This is secret key to use SCRF, must be hard to guess'
     SQLALCHEMY_COMMIT_ON_TEARDOWN = True
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'tasks.sqlite')
+    SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL') or 'sqlite:///' + os.path.join(basedir, 'tasks.sqlite')
+    # 用户名 -> 加盐的密码哈希
+    API_USERS = {'ok': generate_password_hash('python')}
+    AUTH_CACHE_SIZE = 1024
+    AUTH_CACHE_TTL = 60
+    TASKS_PER_PAGE = 20
+    TASKS_MAX_PER_PAGE = 100
+    TASKS_MAX_BATCH = 500
+    TASKS_STREAM_BATCH = 1000
+    # 是否统计各阶段耗时(Server-Timing 响应头与 /api/v1.0/metrics)
+    TIMING_ENABLED = False
+    # ASGI 模式下执行视图函数与数据库查询的线程数
+    ASGI_THREADS = 16
+    # 是否使用 Tasks.create_fts() 创建的全文索引做 description 子串查询
+    TASKS_FTS = False
+    RESPONSE_CACHE_SIZE = 1024
+
+    # 每个新的 SQLite 连接建立时执行的 PRAGMA，为空则使用 SQLite 的默认设置
+    SQLITE_PRAGMAS = {}
 
     @staticmethod
     def init_app(app):
-        pass
\ No newline at end of file
+        pass
+
+
+class ProductionConfig(Config):
+    # WAL 模式下读写互不阻塞；synchronous=NORMAL 在 WAL 下只在 checkpoint 时 fsync
+    # busy_timeout 让并发写入等待锁而不是立即抛出 database is locked
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,
+        'temp_store': 'MEMORY',
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'poolclass': QueuePool,
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_timeout': 10,
+        'connect_args': {'timeout': 5, 'check_same_thread': False},
+    }
+
+
+config = {
+    'default': Config,
+    'production': ProductionConfig,
+}
\ No newline at end of file
@@ -1,8 +1,10 @@
+import json
+import os
 from app import create_app, db
 from app.models import Tasks
 from flask_script import Manager, Shell
 
-app = create_app()
+app = create_app(os.getenv('FLASK_CONFIG') or 'default')
 manager = Manager(app)
 
 
@@ -12,5 +14,18 @@ def make_shell_context():
 
 manager.add_command('shell', Shell(make_context=make_shell_context))
 
+
+@manager.option('-n', '--tasks', dest='tasks', type=int, default=10000, help='number of tasks to seed')
+@manager.option('-c', '--concurrency', dest='concurrency', type=int, default=16, help='number of concurrent clients')
+@manager.option('-d', '--duration', dest='duration', type=float, default=10.0, help='seconds to run')
+@manager.option('--mix', dest='mix', default='get=60,list=20,post=10,put=5,delete=5',
+                help='weights of get/list/post/put/delete')
+@manager.option('--server', dest='server', choices=('client', 'wsgi', 'asgi'), default='client')
+@manager.option('--config', dest='config', default='default')
+def benchmark(tasks, concurrency, duration, mix, server, config):
+    """Seed tasks in a temporary database and load test the API, printing the result as JSON"""
+    from benchmarks.api import run_benchmark
+    print(json.dumps(run_benchmark(tasks, concurrency, duration, mix, server, config), indent=2))
+
 if __name__ == '__main__':
     manager.run()
\ No newline at end of file
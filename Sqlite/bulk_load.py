@@ -0,0 +1,139 @@
+# bulk_load.py
+# Bulk load COMPANY rows from CSV or JSONL files.
+# Rows are streamed from the file, bound with executemany in chunks and each chunk
+# is committed in its own explicit transaction, so memory stays flat for any file size.
+#
+# python bulk_load.py --sample 1000000 employees.csv   # write a sample file
+# python bulk_load.py employees.csv --chunk-size 50000 --rebuild-indexes
+import argparse
+import csv
+import json
+import random
+import sqlite3
+from itertools import islice
+from time import perf_counter
+
+from company import COLUMNS, create_table, database_name
+
+INSERT_SQL = 'INSERT INTO COMPANY (ID,NAME,AGE,ADDRESS,SALARY) VALUES (?, ?, ?, ?, ?)'
+# CSV has no NULL: an empty field in these columns is NULL (as written by company.export_csv),
+# not the text '' which SQLite would store as is in an INT or REAL column
+NUMERIC_COLUMNS = ('ID', 'AGE', 'SALARY')
+
+
+def read_csv(path):
+    """yield rows as tuples in COLUMNS order, the header names are case insensitive"""
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = [name.strip().upper() for name in next(reader)]
+        positions = [header.index(column) for column in COLUMNS]
+        numeric = [column in NUMERIC_COLUMNS for column in COLUMNS]
+        for record in reader:
+            yield tuple(None if is_numeric and record[position] == '' else record[position]
+                        for position, is_numeric in zip(positions, numeric))
+
+
+def read_jsonl(path):
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = {key.upper(): value for key, value in json.loads(line).items()}
+            yield tuple(record.get(column) for column in COLUMNS)
+
+
+def read_rows(path):
+    if path.endswith('.jsonl') or path.endswith('.json'):
+        return read_jsonl(path)
+    return read_csv(path)
+
+
+def drop_indexes(connect, table='COMPANY'):
+    """
+    drop the secondary indexes of table and return the statements to rebuild them.
+    UNIQUE indexes are kept: they enforce a constraint during the load, and rebuilding one
+    over duplicates loaded meanwhile would fail after the data is committed
+    """
+    unique = {row[1] for row in connect.execute('PRAGMA index_list("{}")'.format(table)) if row[2]}
+    indexes = [(name, sql) for name, sql in connect.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,)) if name not in unique]
+    for name, _ in indexes:
+        connect.execute('DROP INDEX "{}"'.format(name))
+    return [sql for _, sql in indexes]
+
+
+def bulk_load(connect, rows, chunk_size=10000, rebuild_indexes=False):
+    """
+    insert rows in chunks of chunk_size, one transaction per chunk
+    :type connect sqlite3.Connection
+    :return: (number of rows, seconds)
+    """
+    # manage transactions explicitly instead of relying on the implicit BEGIN of sqlite3
+    isolation_level = connect.isolation_level
+    connect.isolation_level = None
+    time_start = perf_counter()
+    count = 0
+    indexes = []
+    try:
+        if rebuild_indexes:
+            indexes = drop_indexes(connect)
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            connect.execute('BEGIN')
+            try:
+                connect.executemany(INSERT_SQL, chunk)
+            except sqlite3.Error:
+                connect.execute('ROLLBACK')
+                raise
+            connect.execute('COMMIT')
+            count += len(chunk)
+    finally:
+        # building an index once over sorted data is much cheaper than updating it per row;
+        # the indexes are rebuilt even if a chunk failed, the chunks before it are committed
+        try:
+            for statement in indexes:
+                connect.execute(statement)
+        finally:
+            connect.isolation_level = isolation_level
+    return count, perf_counter() - time_start
+
+
+def write_sample(path, n):
+    """write n random employees to a CSV or JSONL file"""
+    rnd = random.Random(0)
+    addresses = ['California', 'Texas', 'Norway', 'Rich-Mond', 'South-Hall', 'Houston']
+    with open(path, 'w', newline='') as f:
+        writer = None if path.endswith('.jsonl') else csv.writer(f)
+        if writer:
+            writer.writerow(COLUMNS)
+        for i in range(1, n + 1):
+            row = (i, 'Employee{}'.format(i), rnd.randint(20, 65), rnd.choice(addresses),
+                   round(rnd.uniform(10000, 100000), 2))
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(dict(zip(COLUMNS, row))) + '\n')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path', help='CSV or JSONL file')
+    parser.add_argument('--database', default=database_name)
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    parser.add_argument('--rebuild-indexes', action='store_true', help='drop indexes before loading')
+    parser.add_argument('--sample', type=int, metavar='N', help='write N sample rows to path and exit')
+    args = parser.parse_args()
+
+    if args.sample:
+        write_sample(args.path, args.sample)
+        print('Write {} rows into [{}]'.format(args.sample, args.path))
+    else:
+        connect = sqlite3.connect(args.database)
+        create_table(connect)
+        total, seconds = bulk_load(connect, read_rows(args.path), args.chunk_size, args.rebuild_indexes)
+        connect.close()
+        print('Load {} rows in {:.3f} seconds, {:.0f} rows/s'.format(total, seconds, total / seconds if seconds else 0))
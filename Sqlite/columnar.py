@@ -0,0 +1,223 @@
+# columnar.py
+# Read COMPANY into compact column arrays and compute grouped aggregates over them.
+# Columns are loaded in batches with company.scan_batches into array.array buffers
+# (8 bytes per number, text columns dictionary encoded), optionally cached on disk.
+# Group-by aggregates are vectorized with NumPy when it is installed, otherwise
+# they fall back to plain Python over the same arrays.
+#
+# python columnar.py --rows 1000000 --by AGE
+import argparse
+import json
+import os
+import sqlite3
+from array import array
+from time import perf_counter
+
+import company
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+NUMERIC_TYPES = {'ID': 'q', 'AGE': 'q', 'SALARY': 'd'}
+NAN = float('nan')
+
+
+class Columns:
+    """
+    column arrays of COMPANY
+    numeric columns are array.array, text columns are an array of codes plus the list of distinct values;
+    NULL is stored as NaN in REAL columns
+    """
+
+    def __init__(self, data, categories):
+        self.data = data
+        self.categories = categories
+
+    def __len__(self):
+        return len(next(iter(self.data.values()))) if self.data else 0
+
+    def values(self, column):
+        """the column as a NumPy array (without copying) if NumPy is available, else the array.array"""
+        data = self.data[column]
+        return np.frombuffer(data, dtype=data.typecode) if np is not None else data
+
+    def save(self, directory, fingerprint):
+        os.makedirs(directory, exist_ok=True)
+        for column, data in self.data.items():
+            with open(os.path.join(directory, column + '.bin'), 'wb') as f:
+                data.tofile(f)
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'rows': len(self),
+                       'types': {column: data.typecode for column, data in self.data.items()},
+                       'categories': self.categories}, f)
+
+    @classmethod
+    def load(cls, directory, fingerprint):
+        """return the cached columns, or None if there is no cache or it is out of date"""
+        try:
+            with open(os.path.join(directory, 'meta.json')) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta['fingerprint'] != fingerprint:
+            return None
+        data = {}
+        for column, typecode in meta['types'].items():
+            data[column] = array(typecode)
+            with open(os.path.join(directory, column + '.bin'), 'rb') as f:
+                data[column].fromfile(f, meta['rows'])
+        return cls(data, meta['categories'])
+
+
+def fingerprint(database):
+    stat = os.stat(database)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_columns(connection, columns=('AGE', 'ADDRESS', 'SALARY'), batch_size=10000):
+    """:type connection sqlite3.Connection"""
+    columns = [column.upper() for column in columns]
+    data = {column: array(NUMERIC_TYPES.get(column, 'l')) for column in columns}
+    categories = {column: [] for column in columns if column not in NUMERIC_TYPES}
+    codes = {column: {} for column in categories}
+    for rows in company.scan_batches(connection, columns, batch_size):
+        for position, column in enumerate(columns):
+            values = [row[position] for row in rows]
+            if column in codes:
+                mapping = codes[column]
+                for value in values:
+                    if value not in mapping:
+                        mapping[value] = len(categories[column])
+                        categories[column].append(value)
+                values = [mapping[value] for value in values]
+            elif data[column].typecode == 'd':
+                values = [NAN if value is None else value for value in values]
+            data[column].extend(values)
+    return Columns(data, categories)
+
+
+def load_columns(database=company.database_name, columns=('AGE', 'ADDRESS', 'SALARY'),
+                 batch_size=10000, cache_dir=None):
+    """read the columns from database, or from cache_dir if the cache matches the database file"""
+    columns = [column.upper() for column in columns]
+    if cache_dir:
+        cached = Columns.load(cache_dir, fingerprint(database))
+        if cached is not None and all(column in cached.data for column in columns):
+            return cached
+    connection = sqlite3.connect(database)
+    try:
+        result = read_columns(connection, columns, batch_size)
+    finally:
+        connection.close()
+    if cache_dir:
+        result.save(cache_dir, fingerprint(database))
+    return result
+
+
+def _interpolate(sorted_values, start, count, p):
+    position = start + (count - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, start + count - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def group_by(columns, key, value='SALARY', percentiles=(50, 90, 99)):
+    """
+    count, sum, mean and percentiles (linear interpolation) of value grouped by key
+    NULL (NaN) values are skipped like SQL SUM/AVG do, a group without any value has count 0 and None
+    :type columns Columns
+    :return: {key value: {'count': .., 'sum': .., 'mean': .., 'p50': .., ...}}
+    """
+    key, value = key.upper(), value.upper()
+    labels = columns.categories.get(key)
+    if not len(columns):
+        return {}
+    names = ['count', 'sum', 'mean'] + ['p{}'.format(p) for p in percentiles]
+    if np is not None:
+        keys, values = columns.values(key), columns.values(value).astype(np.float64)
+        groups, inverse = np.unique(keys, return_inverse=True)
+        present = ~np.isnan(values)
+        if not present.all():
+            inverse, values = inverse[present], values[present]
+        counts = np.bincount(inverse, minlength=len(groups))
+        sums = np.bincount(inverse, weights=values, minlength=len(groups))
+        # sort by group, then by value: each group becomes a sorted slice of one array;
+        # the extra element keeps the indices of groups without values inside the array
+        order = np.lexsort((values, inverse))
+        sorted_values = np.append(values[order], np.nan)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sizes = np.maximum(counts, 1)
+        result = {'count': counts, 'sum': sums, 'mean': sums / sizes}
+        for p in percentiles:
+            position = starts + (sizes - 1) * p / 100
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, starts + sizes - 1)
+            result['p{}'.format(p)] = sorted_values[lower] + \
+                (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+        stats = {name: data.tolist() for name, data in result.items()}
+        counts = stats['count']
+        return {labels[group] if labels else group:
+                {name: stats[name][i] if counts[i] or name == 'count' else None for name in names}
+                for i, group in enumerate(groups.tolist())}
+
+    buckets = {}
+    for group, amount in zip(columns.data[key], columns.data[value]):
+        bucket = buckets.setdefault(group, [])
+        # NaN is the only value not equal to itself
+        if amount == amount:
+            bucket.append(amount)
+    result = {}
+    for group in sorted(buckets):
+        amounts = sorted(buckets[group])
+        if not amounts:
+            stats = dict.fromkeys(names)
+            stats['count'] = 0
+        else:
+            total = sum(amounts)
+            stats = {'count': len(amounts), 'sum': total, 'mean': total / len(amounts)}
+            for p in percentiles:
+                stats['p{}'.format(p)] = _interpolate(amounts, 0, len(amounts), p)
+        result[labels[group] if labels else group] = stats
+    return result
+
+
+def sql_group_by(connection, key, value='SALARY'):
+    """the same count/sum/mean computed by SQLite with GROUP BY, count only counts non-NULL values"""
+    sql = 'SELECT {0}, COUNT({1}), SUM({1}), AVG({1}) FROM COMPANY GROUP BY {0}'.format(key.upper(), value.upper())
+    return {row[0]: {'count': row[1], 'sum': row[2], 'mean': row[3]} for row in connection.execute(sql)}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--database', default='columnar_benchmark.db')
+    parser.add_argument('--rows', type=int, default=1000000, help='rows to generate if the database is empty')
+    parser.add_argument('--by', default='AGE', choices=('AGE', 'ADDRESS'))
+    parser.add_argument('--cache-dir', default=None)
+    args = parser.parse_args()
+
+    connection = company.connect(args.database)
+    company.create_table(connection)
+    if connection.execute('SELECT COUNT(*) FROM COMPANY').fetchone()[0] == 0:
+        addresses = ['California', 'Texas', 'Norway', 'Rich-Mond', 'South-Hall', 'Houston']
+        company.insert_many(connection, ((i, 'Employee{}'.format(i), 20 + i % 46, addresses[i % 6],
+                                          10000.0 + (i * 7919) % 90000) for i in range(1, args.rows + 1)))
+        connection.commit()
+
+    time_start = perf_counter()
+    sql_result = sql_group_by(connection, args.by)
+    print('SQL GROUP BY                {:.3f} seconds'.format(perf_counter() - time_start))
+    connection.close()
+
+    time_start = perf_counter()
+    columns = load_columns(args.database, ('AGE', 'ADDRESS', 'SALARY'), cache_dir=args.cache_dir)
+    print('load columns                {:.3f} seconds'.format(perf_counter() - time_start))
+    time_start = perf_counter()
+    result = group_by(columns, args.by, percentiles=())
+    print('{:<27} {:.3f} seconds'.format('group by ({})'.format('numpy' if np is not None else 'python'),
+                                         perf_counter() - time_start))
+    time_start = perf_counter()
+    result = group_by(columns, args.by)
+    print('group by with percentiles   {:.3f} seconds'.format(perf_counter() - time_start))
+    assert all(result[group]['count'] == sql_result[group]['count'] for group in sql_result)
@@ -0,0 +1,180 @@
+# company.py
+# Data access functions for the COMPANY table used in sqlite.py.
+# Every statement is parameterized with '?' placeholders, so sqlite3 can reuse the
+# prepared statement from its per-connection cache instead of parsing SQL each time.
+import csv
+import io
+import sqlite3
+import sys
+from collections import namedtuple
+from functools import lru_cache
+
+database_name = 'Sqlite.db'
+COLUMNS = ('ID', 'NAME', 'AGE', 'ADDRESS', 'SALARY')
+Company = namedtuple('Company', [column.lower() for column in COLUMNS])
+
+
+def company_factory(cursor, row):
+    """row factory for queries selecting every column of COMPANY in COLUMNS order"""
+    return Company(*row)
+
+
+@lru_cache(maxsize=64)
+def _row_class(fields):
+    return namedtuple('Row', fields)
+
+
+def namedtuple_factory(cursor, row):
+    """row factory for arbitrary column lists, the row class is created once per column list"""
+    return _row_class(tuple(column[0].lower() for column in cursor.description))(*row)
+
+
+def dict_factory(cursor, row):
+    return {column[0].lower(): value for column, value in zip(cursor.description, row)}
+
+
+def connect(database=database_name, cached_statements=128, row_factory=None, **kwargs):
+    """
+    :param cached_statements: size of the prepared statement cache of the connection, 0 disables it
+    :param row_factory: namedtuple_factory, dict_factory, sqlite3.Row or None (plain tuples);
+        get() and list_all() return Company rows unless another factory is set here
+    """
+    connection = sqlite3.connect(database, cached_statements=cached_statements, **kwargs)
+    connection.row_factory = row_factory
+    return connection
+
+
+def create_table(connection):
+    connection.execute("""CREATE TABLE IF NOT EXISTS COMPANY(
+        ID INT PRIMARY KEY     NOT NULL,
+        NAME           TEXT    NOT NULL,
+        AGE            INT     NOT NULL,
+        ADDRESS        CHAR(50),
+        SALARY         REAL);""")
+
+
+def insert(connection, company):
+    """:type company Company or tuple in COLUMNS order"""
+    connection.execute('INSERT INTO COMPANY (ID,NAME,AGE,ADDRESS,SALARY) VALUES (?, ?, ?, ?, ?)', tuple(company))
+
+
+def insert_many(connection, companies):
+    connection.executemany('INSERT INTO COMPANY (ID,NAME,AGE,ADDRESS,SALARY) VALUES (?, ?, ?, ?, ?)',
+                           (tuple(company) for company in companies))
+
+
+def _full_rows(connection):
+    """cursor for queries selecting every column, company_factory only applies to those"""
+    cursor = connection.cursor()
+    cursor.row_factory = connection.row_factory or company_factory
+    return cursor
+
+
+def get(connection, company_id):
+    return _full_rows(connection).execute('SELECT ID, NAME, AGE, ADDRESS, SALARY FROM COMPANY WHERE ID = ?',
+                                          (company_id,)).fetchone()
+
+
+def list_all(connection):
+    return _full_rows(connection).execute('SELECT ID, NAME, AGE, ADDRESS, SALARY FROM COMPANY ORDER BY ID').fetchall()
+
+
+def update(connection, company_id, **fields):
+    """update(connection, 1, salary=25000.00), return the number of updated rows"""
+    columns = [column.upper() for column in fields]
+    if not columns or any(column not in COLUMNS[1:] for column in columns):
+        raise ValueError('Unknown columns: {}'.format(', '.join(fields)))
+    # column names cannot be bound, they are checked against COLUMNS above
+    sql = 'UPDATE COMPANY SET {} WHERE ID = ?'.format(', '.join('{} = ?'.format(column) for column in columns))
+    return connection.execute(sql, tuple(fields.values()) + (company_id,)).rowcount
+
+
+def update_salary(connection, company_id, salary):
+    return connection.execute('UPDATE COMPANY SET SALARY = ? WHERE ID = ?', (salary, company_id)).rowcount
+
+
+def delete(connection, company_id):
+    return connection.execute('DELETE FROM COMPANY WHERE ID = ?', (company_id,)).rowcount
+
+
+def _projection(columns):
+    columns = [column.upper() for column in columns]
+    if not columns or any(column not in COLUMNS for column in columns):
+        raise ValueError('Unknown columns: {}'.format(', '.join(columns)))
+    return columns
+
+
+def scan_batches(connection, columns=COLUMNS, batch_size=1000, row_factory=None):
+    """
+    yield the rows of COMPANY ordered by ID in lists of at most batch_size rows
+    :param columns: projection, a subset of COLUMNS
+    :param row_factory: row factory of the scan cursor, plain tuples by default
+    """
+    columns = _projection(columns)
+    cursor = connection.cursor()
+    cursor.row_factory = row_factory
+    cursor.arraysize = batch_size
+    cursor.execute('SELECT {} FROM COMPANY ORDER BY ID'.format(', '.join(columns)))
+    try:
+        while True:
+            rows = cursor.fetchmany()
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+
+def scan(connection, columns=COLUMNS, batch_size=1000, row_factory=None):
+    """yield the rows of COMPANY one by one, fetched from sqlite in batches"""
+    for rows in scan_batches(connection, columns, batch_size, row_factory):
+        yield from rows
+
+
+def write_rows(connection, columns=COLUMNS, out=None, batch_size=1000):
+    """
+    write rows in the same layout as sqlite.py, formatting a whole batch into one buffer
+    and writing it with a single call instead of one print per field
+    """
+    out = out or sys.stdout
+    columns = _projection(columns)
+    template = ''.join('{} = {{}}\n'.format(column if column == 'ID' else column.capitalize())
+                       for column in columns) + '\n'
+    count = 0
+    for rows in scan_batches(connection, columns, batch_size):
+        out.write(''.join(template.format(*row) for row in rows))
+        count += len(rows)
+    return count
+
+
+def export_csv(connection, path, columns=COLUMNS, batch_size=1000):
+    """export COMPANY to a CSV file, only one batch of rows is held in memory at a time"""
+    columns = _projection(columns)
+    count = 0
+    with open(path, 'w', newline='', buffering=io.DEFAULT_BUFFER_SIZE * 16) as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in scan_batches(connection, columns, batch_size):
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+if __name__ == '__main__':
+    # the same steps as sqlite.py, written with the functions above
+    connection = connect(':memory:')
+    create_table(connection)
+    insert_many(connection, [
+        Company(1, 'Paul', 32, 'California', 20000.00),
+        Company(2, 'Allen', 25, 'Texas', 15000.00),
+        Company(3, 'Teddy', 23, 'Norway', 20000.00),
+        Company(4, 'Mark', 25, 'Rich-Mond ', 65000.00),
+    ])
+    connection.commit()
+    update_salary(connection, 1, 25000.00)
+    delete(connection, 2)
+    connection.commit()
+    for company in list_all(connection):
+        print(company)
+    write_rows(connection, ('ID', 'NAME', 'ADDRESS', 'SALARY'))
+    connection.close()
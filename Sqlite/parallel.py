@@ -0,0 +1,107 @@
+# parallel.py
+# Split an aggregate scan over COMPANY into ID ranges and run them in a process pool.
+# Every worker opens its own read-only connection (file:...?mode=ro), computes a partial
+# aggregate for each range it receives, and the parent merges the partial results.
+#
+# python parallel.py --rows 2000000 --workers 8   # prints the speedup for 1..8 workers
+import argparse
+import os
+import sqlite3
+from multiprocessing import Pool
+from time import perf_counter
+from urllib.request import pathname2url
+
+import company
+
+_connection = None
+
+
+def read_only_uri(database):
+    return 'file:{}?mode=ro'.format(pathname2url(os.path.abspath(database)))
+
+
+def _init_worker(database):
+    global _connection
+    _connection = sqlite3.connect(read_only_uri(database), uri=True)
+
+
+def id_ranges(database, parts):
+    """split [MIN(ID), MAX(ID)] into at most parts inclusive ranges"""
+    connection = sqlite3.connect(read_only_uri(database), uri=True)
+    try:
+        low, high = connection.execute('SELECT MIN(ID), MAX(ID) FROM COMPANY').fetchone()
+    finally:
+        connection.close()
+    if low is None:
+        return []
+    step = max(1, (high - low + parts) // parts)
+    return [(start, min(start + step - 1, high)) for start in range(low, high + 1, step)]
+
+
+def partial_aggregate(task):
+    """
+    aggregate SALARY grouped by key for one ID range in a worker process
+    :return: {key value: [count, sum, min, max]}, count of non-NULL salaries, the others None without any
+    """
+    key, (low, high) = task
+    sql = ('SELECT {0}, COUNT(SALARY), SUM(SALARY), MIN(SALARY), MAX(SALARY) FROM COMPANY '
+           'WHERE ID BETWEEN ? AND ? GROUP BY {0}').format(key)
+    return {row[0]: list(row[1:]) for row in _connection.execute(sql, (low, high))}
+
+
+def merge(partials):
+    """combine partial aggregates, a range whose salaries are all NULL only adds its group, like AVG"""
+    result = {}
+    for partial in partials:
+        for group, (count, total, minimum, maximum) in partial.items():
+            merged = result.setdefault(group, [0, None, None, None])
+            if not count:
+                continue
+            merged[0] += count
+            if merged[1] is None:
+                merged[1:] = [total, minimum, maximum]
+            else:
+                merged[1] += total
+                merged[2] = min(merged[2], minimum)
+                merged[3] = max(merged[3], maximum)
+    return {group: {'count': count, 'sum': total, 'mean': total / count if count else None,
+                    'min': minimum, 'max': maximum}
+            for group, (count, total, minimum, maximum) in result.items()}
+
+
+def parallel_aggregate(database, key='AGE', workers=os.cpu_count(), ranges_per_worker=4):
+    """aggregate SALARY grouped by key (AGE or ADDRESS) in a pool of `workers` processes"""
+    key = key.upper()
+    if key not in company.COLUMNS:
+        raise ValueError('Unknown column: {}'.format(key))
+    # more ranges than workers so a slow range does not leave the other workers idle
+    ranges = id_ranges(database, workers * ranges_per_worker)
+    with Pool(workers, initializer=_init_worker, initargs=(database,)) as pool:
+        partials = pool.imap_unordered(partial_aggregate, [(key, id_range) for id_range in ranges])
+        return merge(partials)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--database', default='parallel_benchmark.db')
+    parser.add_argument('--rows', type=int, default=2000000, help='rows to generate if the database is empty')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--by', default='AGE', choices=('AGE', 'ADDRESS'))
+    args = parser.parse_args()
+
+    connection = company.connect(args.database)
+    company.create_table(connection)
+    if connection.execute('SELECT COUNT(*) FROM COMPANY').fetchone()[0] == 0:
+        addresses = ['California', 'Texas', 'Norway', 'Rich-Mond', 'South-Hall', 'Houston']
+        company.insert_many(connection, ((i, 'Employee{}'.format(i), 20 + i % 46, addresses[i % 6],
+                                          10000.0 + (i * 7919) % 90000) for i in range(1, args.rows + 1)))
+        connection.commit()
+    connection.close()
+
+    baseline = None
+    for workers in range(1, args.workers + 1):
+        time_start = perf_counter()
+        parallel_aggregate(args.database, args.by, workers)
+        elapsed = perf_counter() - time_start
+        baseline = baseline or elapsed
+        print('workers = {:>2}  {:.3f} seconds  speedup = {:.2f}x'.format(workers, elapsed, baseline / elapsed))
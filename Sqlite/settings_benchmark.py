@@ -0,0 +1,139 @@
+# settings_benchmark.py
+# Run the workload of sqlite.py (create, insert, select, update, delete on COMPANY) at scale
+# under every combination of journal_mode, synchronous, mmap_size, cache_size and page_size,
+# and print the timings as a table or JSON.
+#
+# python settings_benchmark.py --rows 100000 --journal-modes DELETE,WAL --json results.json
+import argparse
+import itertools
+import json
+import os
+import random
+import shutil
+import tempfile
+from time import perf_counter
+
+import company
+
+
+def apply_settings(connection, settings):
+    # page_size only takes effect on an empty database, so it is set before anything else
+    connection.execute('PRAGMA page_size = {}'.format(settings['page_size']))
+    connection.execute('PRAGMA journal_mode = {}'.format(settings['journal_mode']))
+    connection.execute('PRAGMA synchronous = {}'.format(settings['synchronous']))
+    connection.execute('PRAGMA mmap_size = {}'.format(settings['mmap_size']))
+    connection.execute('PRAGMA cache_size = {}'.format(settings['cache_size']))
+
+
+def workload(connection, rows, operations):
+    """return {phase: seconds} for one run of the COMPANY workload"""
+    rnd = random.Random(0)
+    ids = [rnd.randint(1, rows) for _ in range(operations)]
+    timings = {}
+
+    time_start = perf_counter()
+    company.create_table(connection)
+    connection.commit()
+    timings['create'] = perf_counter() - time_start
+
+    time_start = perf_counter()
+    company.insert_many(connection, ((i, 'Employee{}'.format(i), 20 + i % 46, 'California', 20000.00)
+                                     for i in range(1, rows + 1)))
+    connection.commit()
+    timings['bulk_insert'] = perf_counter() - time_start
+
+    # one transaction per statement, like the commits in sqlite.py, shows the cost of each sync
+    time_start = perf_counter()
+    for i in range(rows + 1, rows + 1 + operations // 10):
+        company.insert(connection, (i, 'Employee{}'.format(i), 30, 'Texas', 15000.00))
+        connection.commit()
+    timings['insert_commit'] = perf_counter() - time_start
+
+    time_start = perf_counter()
+    for company_id in ids:
+        company.get(connection, company_id)
+    timings['select'] = perf_counter() - time_start
+
+    time_start = perf_counter()
+    connection.execute('SELECT AGE, COUNT(*), AVG(SALARY) FROM COMPANY GROUP BY AGE').fetchall()
+    timings['scan'] = perf_counter() - time_start
+
+    time_start = perf_counter()
+    for company_id in ids:
+        company.update_salary(connection, company_id, 25000.00)
+    connection.commit()
+    timings['update'] = perf_counter() - time_start
+
+    time_start = perf_counter()
+    for company_id in ids[:operations // 10]:
+        company.delete(connection, company_id)
+        connection.commit()
+    timings['delete_commit'] = perf_counter() - time_start
+    return timings
+
+
+def run_matrix(rows, operations, matrix, directory):
+    results = []
+    names = list(matrix)
+    for values in itertools.product(*(matrix[name] for name in names)):
+        settings = dict(zip(names, values))
+        database = os.path.join(directory, 'settings.db')
+        for suffix in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(database + suffix):
+                os.remove(database + suffix)
+        connection = company.connect(database)
+        apply_settings(connection, settings)
+        timings = workload(connection, rows, operations)
+        connection.close()
+        timings['total'] = sum(timings.values())
+        results.append({'settings': settings, 'seconds': {phase: round(t, 4) for phase, t in timings.items()}})
+        print('.', end='', flush=True)
+    print()
+    return results
+
+
+def print_table(results):
+    names = list(results[0]['settings'])
+    phases = list(results[0]['seconds'])
+    header = ['{:>12}'.format(name) for name in names] + ['{:>13}'.format(phase) for phase in phases]
+    print(' '.join(header))
+    for result in sorted(results, key=lambda r: r['seconds']['total']):
+        cells = ['{:>12}'.format(str(result['settings'][name])) for name in names]
+        cells += ['{:>13.4f}'.format(result['seconds'][phase]) for phase in phases]
+        print(' '.join(cells))
+
+
+def split(values, convert=str):
+    return [convert(value) for value in values.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--operations', type=int, default=10000, help='selects/updates per run')
+    parser.add_argument('--journal-modes', default='DELETE,WAL,MEMORY')
+    parser.add_argument('--synchronous', default='OFF,NORMAL,FULL')
+    parser.add_argument('--mmap-sizes', default='0,268435456')
+    parser.add_argument('--cache-sizes', default='-2000,-65536', help='negative values are KiB')
+    parser.add_argument('--page-sizes', default='4096,16384')
+    parser.add_argument('--directory', default=None, help='where to create the database, a temporary dir by default')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    matrix = {
+        'journal_mode': split(args.journal_modes),
+        'synchronous': split(args.synchronous),
+        'mmap_size': split(args.mmap_sizes, int),
+        'cache_size': split(args.cache_sizes, int),
+        'page_size': split(args.page_sizes, int),
+    }
+    directory = args.directory or tempfile.mkdtemp()
+    try:
+        results = run_matrix(args.rows, args.operations, matrix, directory)
+    finally:
+        if not args.directory:
+            shutil.rmtree(directory)
+    print_table(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'rows': args.rows, 'operations': args.operations, 'results': results}, f, indent=2)
@@ -0,0 +1,53 @@
+# statement_benchmark.py
+# Compare literal SQL strings (a new statement text for every value, parsed and planned each time)
+# with parameterized statements served from the connection's prepared statement cache.
+#
+# python statement_benchmark.py --rows 10000 --queries 200000
+import argparse
+import random
+from time import perf_counter
+
+import company
+
+
+def literal_select(connection, company_id):
+    return connection.execute(
+        'SELECT ID, NAME, AGE, ADDRESS, SALARY FROM COMPANY WHERE ID = {}'.format(company_id)).fetchone()
+
+
+def literal_update(connection, company_id, salary):
+    connection.execute('UPDATE COMPANY SET SALARY = {} WHERE ID = {}'.format(salary, company_id))
+
+
+def run(name, connection, select, update, ids):
+    time_start = perf_counter()
+    for i, company_id in enumerate(ids):
+        if i % 10 == 0:
+            update(connection, company_id, 25000.00 + i % 1000)
+        else:
+            select(connection, company_id)
+    connection.commit()
+    elapsed = perf_counter() - time_start
+    print('{:<28} {:>8} queries in {:.3f} seconds, {:.0f} queries/s'.format(name, len(ids), elapsed, len(ids) / elapsed))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=200000)
+    parser.add_argument('--cached-statements', type=int, default=128)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    ids = [rnd.randint(1, args.rows) for _ in range(args.queries)]
+    for name, cached_statements, select, update in (
+            ('literal', args.cached_statements, literal_select, literal_update),
+            ('parameterized, no cache', 0, company.get, company.update_salary),
+            ('parameterized, cached', args.cached_statements, company.get, company.update_salary)):
+        connection = company.connect(':memory:', cached_statements=cached_statements)
+        company.create_table(connection)
+        company.insert_many(connection, ((i, 'Employee{}'.format(i), 30, 'Texas', 20000.00)
+                                         for i in range(1, args.rows + 1)))
+        connection.commit()
+        run(name, connection, select, update, ids)
+        connection.close()